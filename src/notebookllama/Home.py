@@ -10,10 +10,11 @@ import randomname
 import streamlit.components.v1 as components
 
 from pathlib import Path
-from documents import ManagedDocument, DocumentManager
+from documents import ManagedDocument, DocumentManager, compute_content_hash
 from audio import PODCAST_GEN, PodcastConfig
-from typing import Tuple
+from typing import Optional, Tuple
 from workflow import NotebookLMWorkflow, FileInputEvent, NotebookOutputEvent
+from processing import parse_file
 from instrumentation import OtelTracesSqlEngine
 from llama_index.observability.otel import LlamaIndexOpenTelemetry
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
@@ -76,9 +77,23 @@ def read_html_file(file_path: str) -> str:
         return f.read()
 
 
+def stored_results(
+    document: ManagedDocument,
+) -> Tuple[str, str, str, str, str, Optional[str]]:
+    return (
+        document.content,
+        document.summary,
+        document.q_and_a,
+        document.bullet_points,
+        document.mindmap,
+        document.document_name,
+    )
+
+
 async def run_workflow(
     file: io.BytesIO, document_title: str
-) -> Tuple[str, str, str, str, str]:
+) -> Tuple[str, str, str, str, str, Optional[str]]:
+    # the last element is the name of an already stored copy of the document, if any
     # Create temp file with proper Windows handling
     with temp.NamedTemporaryFile(suffix=".pdf", delete=False) as fl:
         content = file.getvalue()
@@ -87,6 +102,14 @@ async def run_workflow(
         temp_path = fl.name
 
     try:
+        # the parse is cached and reused by the MCP server: documents whose content
+        # is already stored skip the summary, Q&A and mind map generation entirely
+        text, _, _ = await parse_file(file_path=temp_path)
+        if text is not None:
+            stored = document_manager.get_by_content_hash(compute_content_hash(text))
+            if stored is not None:
+                return stored_results(stored)
+
         st_time = int(time.time() * 1000000)
         ev = FileInputEvent(file=temp_path)
         result: NotebookOutputEvent = await WF.run(start_event=ev)
@@ -106,7 +129,7 @@ async def run_workflow(
 
         end_time = int(time.time() * 1000000)
         sql_engine.to_sql_database(start_time=st_time, end_time=end_time)
-        document_manager.put_documents(
+        inserted = document_manager.put_documents(
             [
                 ManagedDocument(
                     document_name=document_title,
@@ -118,7 +141,21 @@ async def run_workflow(
                 )
             ]
         )
-        return result.md_content, result.summary, q_and_a, bullet_points, mind_map
+        if not inserted:
+            # stored by a concurrent upload of the same document in the meantime
+            stored = document_manager.get_by_content_hash(
+                compute_content_hash(result.md_content)
+            )
+            if stored is not None:
+                return stored_results(stored)
+        return (
+            result.md_content,
+            result.summary,
+            q_and_a,
+            bullet_points,
+            mind_map,
+            None,
+        )
 
     finally:
         try:
@@ -208,7 +245,7 @@ if file_input is not None:
     if st.button("Process Document", type="primary"):
         with st.spinner("Processing document... This may take a few minutes."):
             try:
-                md_content, summary, q_and_a, bullet_points, mind_map = (
+                md_content, summary, q_and_a, bullet_points, mind_map, stored_name = (
                     sync_run_workflow(file_input, st.session_state.document_title)
                 )
                 st.session_state.workflow_results = {
@@ -218,7 +255,13 @@ if file_input is not None:
                     "bullet_points": bullet_points,
                     "mind_map": mind_map,
                 }
-                st.success("Document processed successfully!")
+                if stored_name is None:
+                    st.success("Document processed successfully!")
+                else:
+                    st.info(
+                        f"This document already exists as '{stored_name}', "
+                        "showing its stored results."
+                    )
             except Exception as e:
                 st.error(f"Error processing document: {str(e)}")
 
@@ -1,22 +1,48 @@
-import tempfile as temp
+import asyncio
+import hashlib
+import subprocess
+import io
 import os
 import uuid
 from dotenv import load_dotenv
 import logging
-from contextlib import asynccontextmanager
+from collections import OrderedDict
+from contextlib import aclosing
 
+import httpx
 from pydub import AudioSegment
+from pydub.utils import get_encoder_name
 from elevenlabs import AsyncElevenLabs
 from llama_index.core.llms.structured_llm import StructuredLLM
 from typing_extensions import Self
-from typing import List, Literal, Optional, AsyncIterator
-from pydantic import BaseModel, ConfigDict, model_validator, Field
+from typing import (
+    AsyncGenerator,
+    AsyncIterator,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    field_validator,
+    model_validator,
+    Field,
+    PrivateAttr,
+)
+from pydantic_core import PydanticCustomError
 from llama_index.core.llms import ChatMessage
 from llama_index.llms.openai import OpenAIResponses
 
 logger = logging.getLogger(__name__)
 
 
+SPEAKER_ORDER = ("speaker1", "speaker2")
+
+
 class ConversationTurn(BaseModel):
     speaker: Literal["speaker1", "speaker2"] = Field(
         description="The person who is speaking",
@@ -42,22 +68,23 @@ class MultiTurnConversation(BaseModel):
         ],
     )
 
-    @model_validator(mode="after")
-    def validate_conversation(self) -> Self:
-        speakers = [turn.speaker for turn in self.conversation]
-        if speakers[0] != "speaker1":
-            raise ValueError("Conversation must start with speaker1")
-        for i, speaker in enumerate(speakers):
-            if i % 2 == 0 and speaker != "speaker1":
-                raise ValueError(
-                    "Conversation must be an alternance between speaker1 and speaker2"
-                )
-            elif i % 2 != 0 and speaker != "speaker2":
-                raise ValueError(
-                    "Conversation must be an alternance between speaker1 and speaker2"
-                )
-            continue
-        return self
+    @field_validator("conversation")
+    @classmethod
+    def validate_conversation(
+        cls, conversation: List[ConversationTurn]
+    ) -> List[ConversationTurn]:
+        if conversation[0].speaker != SPEAKER_ORDER[0]:
+            raise PydanticCustomError(
+                "speaker_order", "Conversation must start with speaker1"
+            )
+        if not all(
+            turn.speaker == SPEAKER_ORDER[i & 1] for i, turn in enumerate(conversation)
+        ):
+            raise PydanticCustomError(
+                "speaker_order",
+                "Conversation must be an alternance between speaker1 and speaker2",
+            )
+        return conversation
 
 
 class VoiceConfig(BaseModel):
@@ -72,13 +99,16 @@ class VoiceConfig(BaseModel):
     model_id: str = Field(
         default="eleven_turbo_v2_5", description="ElevenLabs model ID"
     )
-    output_format: str = Field(
-        default="mp3_22050_32", description="Audio output format"
+    output_format: str = Field(default="pcm_22050", description="Audio output format")
+    max_concurrent_requests: int = Field(
+        default=8,
+        ge=1,
+        description="Maximum number of text-to-speech requests running at the same time",
     )
 
 
 class AudioQuality(BaseModel):
-    """Configuration for audio quality settings"""
+    """Configuration for audio quality settings, used when the audio is re-encoded"""
 
     bitrate: str = Field(default="320k", description="Audio bitrate")
     quality_params: List[str] = Field(
@@ -89,6 +119,8 @@ class AudioQuality(BaseModel):
 class PodcastConfig(BaseModel):
     """Configuration for podcast generation"""
 
+    model_config = ConfigDict(frozen=True)
+
     # Basic style options
     style: Literal["conversational", "interview", "debate", "educational"] = Field(
         default="conversational",
@@ -133,6 +165,26 @@ class PodcastConfig(BaseModel):
         default_factory=AudioQuality, description="Audio quality settings"
     )
 
+    @field_validator("focus_topics")
+    @classmethod
+    def sort_focus_topics(
+        cls, focus_topics: Optional[List[str]]
+    ) -> Optional[List[str]]:
+        # the order of the topics does not matter: sorted once here, the same topics
+        # always produce the same prompt bytes and the same conversation cache key
+        if focus_topics is None:
+            return None
+        return sorted(focus_topics)
+
+
+AUDIENCE_INSTRUCTIONS = {
+    "beginner": "Explain concepts clearly and avoid jargon. Define technical terms when used.",
+    "business": "Focus on practical applications, ROI, and strategic implications.",
+    "expert": "Assume advanced knowledge and discuss nuanced aspects and implications.",
+    "general": "Balance accessibility with depth, explaining key concepts clearly.",
+    "technical": "Use technical terminology appropriately and dive deep into technical details.",
+}
+
 
 class PodcastGeneratorError(Exception):
     """Base exception for podcast generator errors"""
@@ -155,9 +207,20 @@ class ConversationGenerationError(PodcastGeneratorError):
 class PodcastGenerator(BaseModel):
     llm: StructuredLLM
     client: AsyncElevenLabs
+    cache_conversations: bool = Field(
+        default=True,
+        description="Reuse the conversation script generated for the same transcript and configuration",
+    )
+    conversation_cache_size: int = Field(
+        default=32, ge=1, description="Maximum number of cached conversation scripts"
+    )
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    _conversation_cache: "OrderedDict[str, MultiTurnConversation]" = PrivateAttr(
+        default_factory=OrderedDict
+    )
+
     @model_validator(mode="after")
     def validate_podcast(self) -> Self:
         try:
@@ -173,8 +236,20 @@ class PodcastGenerator(BaseModel):
     ) -> str:
         """Build a customized prompt based on the configuration"""
 
-        # Base prompt with style and tone
-        prompt = f"""Create a {config.style} podcast conversation with two speakers from this transcript.
+        # Stable prefix: the instructions and the source material do not depend on the
+        # configuration, so repeated generations for the same transcript share it and
+        # can hit the provider-side prompt cache
+        prompt = """Create a podcast conversation with two speakers from the source material below.
+
+        IMPORTANT: Create an engaging, natural conversation that flows well between the two speakers.
+        The conversation should feel authentic and provide value to the target audience.
+        """
+
+        prompt += f"\nSOURCE MATERIAL:\n'''\n{file_transcript}\n'''\n"
+
+        # Configuration-specific instructions, with style and tone
+        prompt += f"""
+        Create a {config.style} podcast conversation following these settings.
 
         CONVERSATION STYLE: {config.style}
         TONE: {config.tone}
@@ -191,37 +266,40 @@ class PodcastGenerator(BaseModel):
                 prompt += f"- {topic}\n"
 
         # Add audience-specific instructions
-        audience_instructions = {
-            "technical": "Use technical terminology appropriately and dive deep into technical details.",
-            "beginner": "Explain concepts clearly and avoid jargon. Define technical terms when used.",
-            "expert": "Assume advanced knowledge and discuss nuanced aspects and implications.",
-            "business": "Focus on practical applications, ROI, and strategic implications.",
-            "general": "Balance accessibility with depth, explaining key concepts clearly.",
-        }
-
         prompt += (
-            f"\nAUDIENCE APPROACH: {audience_instructions[config.target_audience]}\n"
+            f"\nAUDIENCE APPROACH: {AUDIENCE_INSTRUCTIONS[config.target_audience]}\n"
         )
 
         # Add custom prompt if provided
         if config.custom_prompt:
             prompt += f"\nADDITIONAL INSTRUCTIONS: {config.custom_prompt}\n"
 
-        # Add the source material
-        prompt += f"\nSOURCE MATERIAL:\n'''\n{file_transcript}\n'''\n"
-
-        # Add final instructions
-        prompt += """
-        IMPORTANT: Create an engaging, natural conversation that flows well between the two speakers.
-        The conversation should feel authentic and provide value to the target audience.
-        """
-
         return prompt
 
+    @staticmethod
+    def _conversation_cache_key(file_transcript: str, config: PodcastConfig) -> str:
+        """Hash the inputs that determine the conversation script"""
+        # voice and audio settings only affect the audio, not the script
+        script_config = config.model_dump_json(
+            exclude={"voice_config", "audio_quality"}
+        )
+        return hashlib.sha256(
+            file_transcript.encode() + script_config.encode()
+        ).hexdigest()
+
     async def _conversation_script(
         self, file_transcript: str, config: PodcastConfig
     ) -> MultiTurnConversation:
         """Generate conversation script with customization"""
+        cache_key: Optional[str] = None
+        if self.cache_conversations:
+            cache_key = self._conversation_cache_key(file_transcript, config)
+            cached = self._conversation_cache.get(cache_key)
+            if cached is not None:
+                self._conversation_cache.move_to_end(cache_key)
+                logger.info("Using cached conversation script")
+                return cached
+
         logger.info("Generating conversation script...")
         prompt = self._build_conversation_prompt(file_transcript, config)
 
@@ -240,26 +318,16 @@ class PodcastGenerator(BaseModel):
         logger.info(
             f"Generated conversation with {len(conversation.conversation)} turns"
         )
+        if cache_key is not None:
+            self._conversation_cache[cache_key] = conversation
+            if len(self._conversation_cache) > self.conversation_cache_size:
+                self._conversation_cache.popitem(last=False)
         return conversation
 
-    @asynccontextmanager
-    async def _cleanup_files(self, files: List[str]) -> AsyncIterator[None]:
-        """Context manager to ensure temporary files are cleaned up"""
-        try:
-            yield
-        finally:
-            for file_path in files:
-                try:
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                        logger.debug(f"Cleaned up temporary file: {file_path}")
-                except OSError as e:
-                    logger.warning(f"Failed to clean up file {file_path}: {str(e)}")
-
-    async def _generate_speech_file(
+    async def _generate_speech(
         self, text: str, voice_id: str, config: PodcastConfig
-    ) -> str:
-        """Generate speech file for a single turn"""
+    ) -> bytes:
+        """Generate speech audio for a single turn"""
         try:
             speech_iterator = self.client.text_to_speech.convert(
                 voice_id=voice_id,
@@ -268,65 +336,182 @@ class PodcastGenerator(BaseModel):
                 model_id=config.voice_config.model_id,
             )
 
-            temp_file = temp.NamedTemporaryFile(
-                suffix=".mp3", delete=False, delete_on_close=False
-            )
-
-            with open(temp_file.name, "wb") as f:
-                async for chunk in speech_iterator:
-                    if chunk:
-                        f.write(chunk)
+            audio = bytearray()
+            async for chunk in speech_iterator:
+                if chunk:
+                    audio.extend(chunk)
 
-            return temp_file.name
+            return bytes(audio)
         except Exception as e:
             logger.error(f"Failed to generate speech for text: {text[:50]}")
             raise AudioGenerationError(
                 f"Failed to generate speech for text: {text[:50]}"
             ) from e
 
-    async def _conversation_audio(
+    async def _synthesize_turn(
+        self,
+        turn: ConversationTurn,
+        config: PodcastConfig,
+        semaphore: asyncio.Semaphore,
+    ) -> bytes:
+        """Generate the speech audio for a single conversation turn"""
+        voice_id = (
+            config.voice_config.speaker1_voice_id
+            if turn.speaker == "speaker1"
+            else config.voice_config.speaker2_voice_id
+        )
+        async with semaphore:
+            return await self._generate_speech(turn.content, voice_id, config)
+
+    async def _stream_turns_audio(
         self, conversation: MultiTurnConversation, config: PodcastConfig
-    ) -> str:
-        """Generate audio for the conversation"""
-        files: List[str] = []
+    ) -> AsyncGenerator[bytes, None]:
+        """Yield the audio of each turn in order, as soon as it is ready"""
+        semaphore = asyncio.Semaphore(config.voice_config.max_concurrent_requests)
+        queue: "asyncio.Queue[Tuple[int, Union[bytes, Exception]]]" = asyncio.Queue()
 
-        async with self._cleanup_files(files):
+        async def produce(index: int, turn: ConversationTurn) -> None:
             try:
-                logger.info("Generating audio for conversation")
-
-                for i, turn in enumerate(conversation.conversation):
-                    voice_id = (
-                        config.voice_config.speaker1_voice_id
-                        if turn.speaker == "speaker1"
-                        else config.voice_config.speaker2_voice_id
-                    )
-                    file_path = await self._generate_speech_file(
-                        turn.content, voice_id, config
-                    )
-                    files.append(file_path)
-
-                logger.info("Combining audio files...")
-                output_path = f"conversation_{str(uuid.uuid4())}.mp3"
-                combined_audio: AudioSegment = AudioSegment.empty()
+                audio = await self._synthesize_turn(turn, config, semaphore)
+            except Exception as e:
+                await queue.put((index, e))
+            else:
+                await queue.put((index, audio))
+
+        producers = [
+            asyncio.create_task(produce(index, turn))
+            for index, turn in enumerate(conversation.conversation)
+        ]
+        # turns finish out of order: hold them back until the previous ones are out
+        pending: Dict[int, bytes] = {}
+        next_expected = 0
+        try:
+            while next_expected < len(producers):
+                index, audio = await queue.get()
+                if isinstance(audio, Exception):
+                    raise audio
+                pending[index] = audio
+                while next_expected in pending:
+                    yield pending.pop(next_expected)
+                    next_expected += 1
+        finally:
+            for producer in producers:
+                producer.cancel()
+
+    @staticmethod
+    def _concatenate_segments(segments: List[AudioSegment]) -> AudioSegment:
+        """Concatenate audio segments by joining their raw data once"""
+        if not segments:
+            return AudioSegment.empty()
+        first = segments[0]
+        # align every segment to the first one, so that their raw data can be joined
+        aligned = [
+            segment.set_frame_rate(first.frame_rate)
+            .set_channels(first.channels)
+            .set_sample_width(first.sample_width)
+            for segment in segments
+        ]
+        return AudioSegment(
+            data=b"".join(segment.raw_data for segment in aligned),
+            sample_width=first.sample_width,
+            frame_rate=first.frame_rate,
+            channels=first.channels,
+        )
 
-                for file_path in files:
-                    audio = AudioSegment.from_file(file_path)
-                    combined_audio += audio
+    @staticmethod
+    async def _remux_mp3(turns_audio: AsyncIterator[bytes], output_path: str) -> None:
+        """Concatenate MP3 streams by copying their frames, without re-encoding"""
+        command = [
+            get_encoder_name(),
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "mp3",
+            "-i",
+            "pipe:0",
+            "-c",
+            "copy",
+            output_path,
+        ]
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdin = process.stdin
+        assert stdin is not None
+        try:
+            # each turn is handed to ffmpeg while the following ones are downloading
+            async for audio in turns_audio:
+                stdin.write(audio)
+                await stdin.drain()
+        except BaseException:
+            process.kill()
+            await process.wait()
+            raise
+        _, stderr = await process.communicate()
+        returncode = await process.wait()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, command, stderr=stderr)
 
-                combined_audio.export(
-                    output_path,
-                    format="mp3",
-                    bitrate=config.audio_quality.bitrate,
-                    parameters=config.audio_quality.quality_params,
-                )
+    async def _conversation_audio(
+        self, conversation: MultiTurnConversation, config: PodcastConfig
+    ) -> str:
+        """Generate audio for the conversation"""
+        try:
+            logger.info("Generating audio for conversation")
+
+            output_path = f"conversation_{str(uuid.uuid4())}.mp3"
+            output_format = config.voice_config.output_format
+            # turns are combined in order while the later ones are still downloading
+            async with aclosing(
+                self._stream_turns_audio(conversation, config)
+            ) as turns_audio:
+                if output_format.startswith("mp3"):
+                    # turns share the same codec parameters: copy the frames as they are
+                    await self._remux_mp3(turns_audio, output_path)
+                else:
+                    if output_format.startswith("pcm"):
+                        # raw 16-bit mono PCM does not need decoding, only joining
+                        pcm = bytearray()
+                        async for audio in turns_audio:
+                            pcm.extend(audio)
+                        combined_audio = AudioSegment(
+                            data=bytes(pcm),
+                            sample_width=2,
+                            frame_rate=int(output_format.split("_")[1]),
+                            channels=1,
+                        )
+                    else:
+                        container = output_format.split("_")[0]
+                        segments = []
+                        async for audio in turns_audio:
+                            # decode in a thread, so that downloads keep progressing
+                            segments.append(
+                                await asyncio.to_thread(
+                                    AudioSegment.from_file,
+                                    io.BytesIO(audio),
+                                    format=container,
+                                )
+                            )
+                        combined_audio = self._concatenate_segments(segments)
+                    logger.info("Combining audio...")
+                    combined_audio.export(
+                        output_path,
+                        format="mp3",
+                        bitrate=config.audio_quality.bitrate,
+                        parameters=config.audio_quality.quality_params,
+                    )
 
-                logger.info(f"Successfully created podcast audio: {output_path}")
-                return output_path
-            except Exception as e:
-                logger.error(f"Failed to generate conversation audio: {str(e)}")
-                raise AudioGenerationError(
-                    f"Failed to generate conversation audio: {str(e)}"
-                ) from e
+            logger.info(f"Successfully created podcast audio: {output_path}")
+            return output_path
+        except Exception as e:
+            logger.error(f"Failed to generate conversation audio: {str(e)}")
+            raise AudioGenerationError(
+                f"Failed to generate conversation audio: {str(e)}"
+            ) from e
 
     async def create_conversation(
         self, file_transcript: str, config: Optional[PodcastConfig] = None
@@ -366,7 +551,15 @@ if os.getenv("ELEVENLABS_API_KEY", None) and os.getenv("OPENAI_API_KEY", None):
     SLLM = OpenAIResponses(
         model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY")
     ).as_structured_llm(MultiTurnConversation)
-    EL_CLIENT = AsyncElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+    # a single pooled HTTP client, so concurrent turn requests reuse open connections
+    EL_HTTP_CLIENT = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+        timeout=httpx.Timeout(240.0),
+        follow_redirects=True,
+    )
+    EL_CLIENT = AsyncElevenLabs(
+        api_key=os.getenv("ELEVENLABS_API_KEY"), httpx_client=EL_HTTP_CLIENT
+    )
     PODCAST_GEN = PodcastGenerator(llm=SLLM, client=EL_CLIENT)
 else:
     logger.warning("Missing API keys - PODCAST_GEN not initialized")
@@ -1,21 +1,57 @@
-from dataclasses import dataclass
+import hashlib
+from functools import lru_cache
+from dataclasses import dataclass, asdict
 from sqlalchemy import (
     Table,
     MetaData,
     Column,
+    Index,
+    String,
     Text,
     Integer,
+    Row,
     create_engine,
     Engine,
     Connection,
+    bindparam,
     insert,
+    inspect,
+    make_url,
     select,
+    text,
+    update,
 )
-from typing import Optional, List, cast, Union
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    List,
+    Set,
+    cast,
+    Union,
+)
+
+# rows hashed per query when adding the content_sha256 column to an existing table
+BACKFILL_BATCH_SIZE = 500
+# dialects whose INSERT supports ON CONFLICT DO NOTHING
+_CONFLICT_INSERTS: Dict[
+    str, Callable[[Table], Union[postgresql.Insert, sqlite.Insert]]
+] = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+@lru_cache(maxsize=None)
+def get_engine(engine_url: str) -> Engine:
+    # one pooled engine per database, shared by every DocumentManager in the process
+    if make_url(engine_url).get_backend_name() == "sqlite":
+        return create_engine(engine_url)
+    return create_engine(engine_url, pool_size=10, max_overflow=10, pool_pre_ping=True)
 
 
-def apply_string_correction(string: str) -> str:
-    return string.replace("''", "'").replace('""', '"')
+def compute_content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
 
 
 @dataclass
@@ -38,7 +74,6 @@ class DocumentManager:
     ):
         self.table_name: str = table_name or "documents"
         self._table: Optional[Table] = None
-        self._connection: Optional[Connection] = None
         self.metadata: MetaData = cast(MetaData, table_metadata or MetaData())
         if engine or engine_url:
             self._engine: Union[Engine, str] = cast(
@@ -48,10 +83,11 @@ class DocumentManager:
             raise ValueError("One of engine or engine_setup_kwargs must be set")
 
     @property
-    def connection(self) -> Connection:
-        if not self._connection:
-            self._connect()
-        return cast(Connection, self._connection)
+    def engine(self) -> Engine:
+        # move engine creation outside of constructor
+        if isinstance(self._engine, str):
+            self._engine = get_engine(self._engine)
+        return self._engine
 
     @property
     def table(self) -> Table:
@@ -59,12 +95,6 @@ class DocumentManager:
             self._create_table()
         return cast(Table, self._table)
 
-    def _connect(self) -> None:
-        # move network calls outside of constructor
-        if isinstance(self._engine, str):
-            self._engine = create_engine(self._engine)
-        self._connection = self._engine.connect()
-
     def _create_table(self) -> None:
         self._table = Table(
             self.table_name,
@@ -76,25 +106,116 @@ class DocumentManager:
             Column("q_and_a", Text),
             Column("mindmap", Text),
             Column("bullet_points", Text),
+            Column("content_sha256", String(64)),
+            Index(
+                f"ix_{self.table_name}_content_sha256", "content_sha256", unique=True
+            ),
+        )
+        with self.engine.begin() as conn:
+            self._table.create(conn, checkfirst=True)
+            self._add_content_hash_column(conn)
+
+    def _add_content_hash_column(self, conn: Connection) -> None:
+        # tables created before content hashes were introduced lack the column
+        columns = inspect(conn).get_columns(self.table_name)
+        if not any(column["name"] == "content_sha256" for column in columns):
+            table_name = conn.dialect.identifier_preparer.quote(self.table_name)
+            conn.execute(
+                text(f"ALTER TABLE {table_name} ADD COLUMN content_sha256 VARCHAR(64)")
+            )
+            # a one-off backfill, in the same transaction as the new column
+            self._backfill_content_hashes(conn)
+        for index in cast(Table, self._table).indexes:
+            index.create(conn, checkfirst=True)
+
+    def _backfill_content_hashes(self, conn: Connection) -> None:
+        table = cast(Table, self._table)
+        stmt = (
+            select(table.c.id, table.c.content)
+            .where(table.c.content.is_not(None))
+            .order_by(table.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        )
+        set_hash = (
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(content_sha256=bindparam("row_hash"))
+        )
+        seen: Set[str] = set()
+        last_id: Optional[int] = None
+        # keyset pagination: only one batch of document bodies is held in memory
+        while True:
+            batch_stmt = stmt if last_id is None else stmt.where(table.c.id > last_id)
+            batch = conn.execute(batch_stmt).all()
+            if not batch:
+                return
+            updates = []
+            for row_id, content in batch:
+                content_hash = compute_content_hash(content)
+                # older duplicates keep a NULL hash, so the unique index can be built
+                if content_hash not in seen:
+                    seen.add(content_hash)
+                    updates.append({"row_id": row_id, "row_hash": content_hash})
+            if updates:
+                conn.execute(set_hash, updates)
+            last_id = batch[-1].id
+
+    @staticmethod
+    def _row_to_document(row: Row) -> ManagedDocument:
+        return ManagedDocument(
+            document_name=row.document_name,
+            content=row.content,
+            summary=row.summary,
+            q_and_a=row.q_and_a,
+            mindmap=row.mindmap,
+            bullet_points=row.bullet_points,
         )
-        self._table.create(self.connection, checkfirst=True)
 
-    def put_documents(self, documents: List[ManagedDocument]) -> None:
+    def put_documents(self, documents: List[ManagedDocument]) -> List[str]:
+        # returns the content hashes that were inserted: the others were already stored
+        if not documents:
+            return []
+        table = self.table
+        # documents are deduplicated on their content, within the batch and the table
+        rows: Dict[str, Dict[str, Any]] = {}
         for document in documents:
-            stmt = insert(self.table).values(
-                document_name=document.document_name,
-                content=document.content,
-                summary=document.summary,
-                q_and_a=document.q_and_a,
-                mindmap=document.mindmap,
-                bullet_points=document.bullet_points,
+            content_hash = compute_content_hash(document.content)
+            rows.setdefault(
+                content_hash, {**asdict(document), "content_sha256": content_hash}
             )
-            self.connection.execute(stmt)
-        self.connection.commit()
+        with self.engine.begin() as conn:
+            conflict_insert = _CONFLICT_INSERTS.get(conn.dialect.name)
+            if conflict_insert is not None:
+                # content already stored, even by a concurrent put, is skipped
+                # by the unique index instead of raising an IntegrityError
+                stmt = conflict_insert(table).on_conflict_do_nothing(
+                    index_elements=["content_sha256"]
+                )
+                result = conn.execute(
+                    stmt.returning(table.c.content_sha256), list(rows.values())
+                )
+                return list(result.scalars())
+            existing = select(table.c.content_sha256).where(
+                table.c.content_sha256.in_(list(rows))
+            )
+            for content_hash in conn.execute(existing).scalars():
+                rows.pop(content_hash, None)
+            if rows:
+                # a single statement with bound parameters, executed once for all rows
+                conn.execute(insert(table), list(rows.values()))
+        return list(rows)
 
-    def get_documents(self, names: Optional[List[str]] = None) -> List[ManagedDocument]:
-        if self.table is None:
-            self._create_table()
+    def get_by_content_hash(self, content_hash: str) -> Optional[ManagedDocument]:
+        stmt = select(self.table).where(self.table.c.content_sha256 == content_hash)
+        with self.engine.connect() as conn:
+            row = conn.execute(stmt).first()
+        if row is None:
+            return None
+        return self._row_to_document(row)
+
+    def iter_documents(
+        self, names: Optional[List[str]] = None, batch_size: int = 500
+    ) -> Iterator[ManagedDocument]:
         if not names:
             stmt = select(self.table).order_by(self.table.c.id)
         else:
@@ -103,34 +224,22 @@ class DocumentManager:
                 .where(self.table.c.document_name.in_(names))
                 .order_by(self.table.c.id)
             )
-        result = self.connection.execute(stmt)
-        rows = result.fetchall()
-        documents = []
-        for row in rows:
-            documents.append(
-                ManagedDocument(
-                    document_name=row.document_name,
-                    content=row.content,
-                    summary=row.summary,
-                    q_and_a=row.q_and_a,
-                    mindmap=row.mindmap,
-                    bullet_points=row.bullet_points,
-                )
-            )
-        return documents
+        # stream the rows in batches instead of buffering the whole result set
+        with self.engine.connect() as conn:
+            result = conn.execution_options(yield_per=batch_size).execute(stmt)
+            for row in result:
+                yield self._row_to_document(row)
+
+    def get_documents(self, names: Optional[List[str]] = None) -> List[ManagedDocument]:
+        return list(self.iter_documents(names=names))
 
     def get_names(self) -> List[str]:
-        if self.table is None:
-            self._create_table()
-        stmt = select(self.table)
-        result = self.connection.execute(stmt)
-        rows = result.fetchall()
-        return [row.document_name for row in rows]
+        stmt = select(self.table.c.document_name).order_by(self.table.c.id)
+        with self.engine.connect() as conn:
+            return list(conn.execute(stmt).scalars())
 
     def disconnect(self) -> None:
-        if not self._connection:
-            raise ValueError("Engine was never connected!")
         if isinstance(self._engine, str):
-            pass
-        else:
-            self._engine.dispose(close=True)
+            raise ValueError("Engine was never connected!")
+        # closes the pooled connections, the engine itself stays usable
+        self._engine.dispose(close=True)
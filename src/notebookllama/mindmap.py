@@ -1,22 +1,29 @@
+import asyncio
 import uuid
 import os
 import warnings
-import json
-from pydantic import BaseModel, Field, model_validator
+from functools import lru_cache
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from pydantic_core import from_json
 from typing_extensions import Self
 from typing import List, Union
 
 from pyvis.network import Network
 from llama_index.core.llms import ChatMessage
+from llama_index.core.llms.structured_llm import StructuredLLM
 from llama_index.llms.openai import OpenAIResponses
 
 
 class Node(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     content: str
 
 
 class Edge(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     from_id: str
     to_id: str
 
@@ -55,52 +62,69 @@ class MindMap(BaseModel):
 
     @model_validator(mode="after")
     def validate_mind_map(self) -> Self:
-        all_nodes = [el.id for el in self.nodes]
-        all_edges = [el.from_id for el in self.edges] + [el.to_id for el in self.edges]
-        if set(all_nodes).issubset(set(all_edges)) and set(all_nodes) != set(all_edges):
-            raise ValueError(
-                "There are non-existing nodes listed as source or target in the edges"
-            )
+        node_ids = {node.id for node in self.nodes}
+        for edge in self.edges:
+            if edge.from_id not in node_ids or edge.to_id not in node_ids:
+                raise ValueError(
+                    "There are non-existing nodes listed as source or target in the edges"
+                )
         return self
 
 
+# vis-network options shared by every mind map, kept compact so that pyvis has
+# little to normalize before parsing them
+MIND_MAP_OPTIONS = '{"physics": {"enabled": false}}'
+
+
+# the instructions are the same for every document: sent first and unchanged, they
+# form a stable prefix that the provider can serve from its prompt cache. They are
+# the MindMap field descriptions, which the structured LLM already sends as its schema
+MIND_MAP_SYSTEM_PROMPT = "\n".join(
+    f"{name}: {field.description}" for name, field in MindMap.model_fields.items()
+)
+
+
 class MindMapCreationFailedWarning(Warning):
     """A warning returned if the mind map creation failed"""
 
 
-if os.getenv("OPENAI_API_KEY", None):
-    LLM = OpenAIResponses(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"))
-    LLM_STRUCT = LLM.as_structured_llm(MindMap)
+@lru_cache(maxsize=1)
+def _get_llm_struct() -> StructuredLLM:
+    llm = OpenAIResponses(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"))
+    return llm.as_structured_llm(MindMap)
+
+
+def _save_mind_map(mind_map: MindMap) -> str:
+    net = Network(directed=True, height="750px", width="100%")
+    net.set_options(MIND_MAP_OPTIONS)
+    for node in mind_map.nodes:
+        net.add_node(n_id=node.id, label=node.content)
+    for edge in mind_map.edges:
+        net.add_edge(source=edge.from_id, to=edge.to_id)
+    name = str(uuid.uuid4())
+    net.save_graph(name + ".html")
+    return name + ".html"
 
 
 async def get_mind_map(summary: str, highlights: List[str]) -> Union[str, None]:
     try:
-        keypoints = "\n- ".join(highlights)
+        keypoints = "".join(f"\n- {highlight}" for highlight in highlights)
         messages = [
+            ChatMessage(role="system", content=MIND_MAP_SYSTEM_PROMPT),
             ChatMessage(
                 role="user",
-                content=f"This is the summary for my document: {summary}\n\nAnd these are the key points:\n- {keypoints}",
-            )
+                content=f"This is the summary for my document: {summary}\n\nAnd these are the key points:{keypoints}",
+            ),
         ]
-        response = await LLM_STRUCT.achat(messages=messages)
-        response_json = json.loads(response.message.content)
-        net = Network(directed=True, height="750px", width="100%")
-        net.set_options("""
-            var options = {
-            "physics": {
-                "enabled": false
-            }
-            }
-            """)
-        nodes = response_json["nodes"]
-        edges = response_json["edges"]
-        for node in nodes:
-            net.add_node(n_id=node["id"], label=node["content"])
-        for edge in edges:
-            net.add_edge(source=edge["from_id"], to=edge["to_id"])
-        name = str(uuid.uuid4())
-        net.save_graph(name + ".html")
-        return name + ".html"
+        response = await _get_llm_struct().achat(messages=messages)
+        response_json = from_json(response.message.content)
+        # the structured LLM already validated its output against MindMap
+        mind_map = MindMap.model_construct(
+            nodes=[Node.model_construct(**node) for node in response_json["nodes"]],
+            edges=[Edge.model_construct(**edge) for edge in response_json["edges"]],
+        )
+        # building and rendering the graph is blocking work, keep it off the event loop
+        return await asyncio.to_thread(_save_mind_map, mind_map)
     except Exception as e:
         warnings.warn(
             message=f"An error occurred during the creation of the mind map: {e}",
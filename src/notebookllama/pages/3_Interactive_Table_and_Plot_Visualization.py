@@ -12,34 +12,14 @@ from PIL import Image
 
 
 def get_plots_and_tables_sync(file: io.BytesIO):
-    fl = tmp.NamedTemporaryFile(suffix=".pdf", delete=False, delete_on_close=False)
-    with open(fl.name, "wb") as f:
-        f.write(file.getvalue())
+    with tmp.NamedTemporaryFile(suffix=".pdf", delete=False) as fl:
+        fl.write(file.getbuffer())
 
-    # Try to get existing event loop, if not create a new one
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_closed():
-            raise RuntimeError("Event loop is closed")
-    except RuntimeError:
-        # No event loop exists or it's closed, create a new one
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-    # Run the async function in the current event loop
-    if loop.is_running():
-        # If loop is already running (e.g., in Jupyter/Streamlit),
-        # we need to use a different approach
-        import concurrent.futures
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(
-                asyncio.run, get_plots_and_tables(file_path=fl.name)
-            )
-            return future.result()
-    else:
-        # If loop is not running, we can use it directly
-        return loop.run_until_complete(get_plots_and_tables(file_path=fl.name))
+        # Streamlit runs the script in a thread without an event loop
+        return asyncio.run(get_plots_and_tables(file_path=fl.name))
+    finally:
+        os.remove(fl.name)
 
 
 # Direct Streamlit execution
@@ -59,11 +39,8 @@ if uploaded_file is not None:
     # Process the file
     with st.spinner("Processing PDF... This may take a moment."):
         try:
-            # Convert uploaded file to BytesIO
-            file_bytes = io.BytesIO(uploaded_file.getvalue())
-
             # Extract plots and tables
-            image_paths, dataframes = get_plots_and_tables_sync(file_bytes)
+            image_paths, dataframes = get_plots_and_tables_sync(uploaded_file)
 
             # Display results summary
             st.success("✅ Processing complete!")
@@ -1,31 +1,58 @@
 from dotenv import load_dotenv
+import asyncio
+import hashlib
+import httpx
 import pandas as pd
-import json
 import os
 import warnings
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
 
 from mrkdwn_analysis import MarkdownAnalyzer
 from mrkdwn_analysis.markdown_analyzer import InlineParser, MarkdownParser
 from llama_cloud_services import LlamaExtract, LlamaParse
-from llama_cloud_services.extract import SourceText
+from llama_cloud_services.extract import ExtractionAgent, SourceText
+from llama_cloud_services.parse.types import JobResult
 from llama_cloud.client import AsyncLlamaCloud
+from pydantic_core import from_json, to_json
 from typing_extensions import override
-from typing import List, Tuple, Union, Optional, Dict
+from typing import Any, List, Tuple, Union, Optional, Dict
 
 load_dotenv()
 
-if (
-    os.getenv("LLAMACLOUD_API_KEY", None)
-    and os.getenv("EXTRACT_AGENT_ID", None)
-    and os.getenv("LLAMACLOUD_PIPELINE_ID", None)
-):
-    CLIENT = AsyncLlamaCloud(token=os.getenv("LLAMACLOUD_API_KEY"))
-    EXTRACT_AGENT = LlamaExtract(api_key=os.getenv("LLAMACLOUD_API_KEY")).get_agent(
+PIPELINE_ID = os.getenv("LLAMACLOUD_PIPELINE_ID")
+PARSE_CACHE_SIZE = 32
+# shared on disk: process_file runs in the MCP server, get_plots_and_tables in streamlit,
+# so the default is anchored to the repository rather than the working directory
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    ".cache",
+    "parsed",
+)
+# least recently used entries beyond this count are removed from the disk cache
+PARSE_CACHE_MAX_FILES = 256
+
+# parse results of recent files, keyed by the hash of the file content
+_PARSE_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+# clients are built on first use, so that importing the module stays cheap
+@lru_cache(maxsize=1)
+def _get_client() -> AsyncLlamaCloud:
+    return AsyncLlamaCloud(token=os.getenv("LLAMACLOUD_API_KEY"))
+
+
+@lru_cache(maxsize=1)
+def _get_extract_agent() -> ExtractionAgent:
+    return LlamaExtract(api_key=os.getenv("LLAMACLOUD_API_KEY")).get_agent(
         id=os.getenv("EXTRACT_AGENT_ID")
     )
-    PARSER = LlamaParse(api_key=os.getenv("LLAMACLOUD_API_KEY"), result_type="markdown")
-    PIPELINE_ID = os.getenv("LLAMACLOUD_PIPELINE_ID")
+
+
+@lru_cache(maxsize=1)
+def _get_parser() -> LlamaParse:
+    return LlamaParse(api_key=os.getenv("LLAMACLOUD_API_KEY"), result_type="markdown")
 
 
 class MarkdownTextAnalyzer(MarkdownAnalyzer):
@@ -44,98 +71,232 @@ class MarkdownTextAnalyzer(MarkdownAnalyzer):
 
 def md_table_to_pd_dataframe(md_table: Dict[str, list]) -> Optional[pd.DataFrame]:
     try:
-        df = pd.DataFrame()
-        for i in range(len(md_table["header"])):
-            ls = [row[i] for row in md_table["rows"]]
-            df[md_table["header"][i]] = ls
-        return df
+        return pd.DataFrame(md_table["rows"], columns=md_table["header"])
     except Exception as e:
         warnings.warn(f"Skipping table as an error occurred: {e}")
         return None
 
 
+def _timestamp() -> str:
+    return datetime.now().strftime("%Y_%d_%m_%H_%M_%S_%f")[:-3]
+
+
+def _rename_past_image(image_path: str, suffix: str) -> str:
+    new_path = (
+        os.path.splitext(image_path)[0].replace("_current", "") + f"_at_{suffix}.png"
+    )
+    # a rename on the same filesystem, no bytes are copied
+    os.replace(image_path, new_path)
+    return new_path
+
+
+def _list_past_images(path: str) -> List[str]:
+    if not os.path.exists(path):
+        return []
+    # scandir entries carry their file type, no extra stat call per image
+    with os.scandir(path) as entries:
+        return [
+            entry.path
+            for entry in entries
+            if entry.is_file() and "_at_" not in entry.name
+        ]
+
+
 def rename_and_remove_past_images(path: str = "static/") -> List[str]:
-    renamed = []
-    if os.path.exists(path) and len(os.listdir(path)) >= 0:
-        for image_file in os.listdir(path):
-            image_path = os.path.join(path, image_file)
-            if os.path.isfile(image_path) and "_at_" not in image_path:
-                with open(image_path, "rb") as img:
-                    bts = img.read()
-                new_path = (
-                    os.path.splitext(image_path)[0].replace("_current", "")
-                    + f"_at_{datetime.now().strftime('%Y_%d_%m_%H_%M_%S_%f')[:-3]}.png"
-                )
-                with open(
-                    new_path,
-                    "wb",
-                ) as img_tw:
-                    img_tw.write(bts)
-                renamed.append(new_path)
-                os.remove(image_path)
-    return renamed
+    # one timestamp for the whole batch, the index keeps the names unique
+    timestamp = _timestamp()
+    return [
+        _rename_past_image(image, f"{timestamp}_{i}")
+        for i, image in enumerate(_list_past_images(path))
+    ]
+
+
+def _rename_current_image(image: str) -> str:
+    new_path = os.path.splitext(image)[0] + "_current.png"
+    os.replace(image, new_path)
+    return new_path
 
 
 def rename_and_remove_current_images(images: List[str]) -> List[str]:
-    imgs = []
-    for image in images:
-        with open(image, "rb") as rb:
-            bts = rb.read()
-        with open(os.path.splitext(image)[0] + "_current.png", "wb") as wb:
-            wb.write(bts)
-        imgs.append(os.path.splitext(image)[0] + "_current.png")
-        os.remove(image)
-    return imgs
+    return [_rename_current_image(image) for image in images]
+
+
+async def _arename_and_remove_past_images(path: str = "static/") -> List[str]:
+    # every image is an independent blocking file operation, run them in threads
+    images = await asyncio.to_thread(_list_past_images, path)
+    timestamp = _timestamp()
+    return await asyncio.gather(
+        *(
+            asyncio.to_thread(_rename_past_image, image, f"{timestamp}_{i}")
+            for i, image in enumerate(images)
+        )
+    )
+
+
+async def _arename_and_remove_current_images(images: List[str]) -> List[str]:
+    return await asyncio.gather(
+        *(asyncio.to_thread(_rename_current_image, image) for image in images)
+    )
+
+
+def _file_digest(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, "blake2b").hexdigest()
+
+
+def _parse_entry(document: JobResult) -> Dict[str, Any]:
+    return {
+        "job_id": document.job_id,
+        "file_name": document.file_name,
+        "job_result": document.model_dump(mode="json", exclude={"job_id", "file_name"}),
+    }
+
+
+def _job_result(entry: Dict[str, Any]) -> JobResult:
+    # a new JobResult, with its own httpx client, for every call: a client bound to
+    # the event loop of an earlier asyncio.run fails in the next one
+    parser = _get_parser()
+    return JobResult(
+        job_id=entry["job_id"],
+        file_name=entry["file_name"],
+        job_result=entry["job_result"],
+        api_key=parser.api_key,
+        base_url=parser.base_url,
+        page_separator=parser.page_separator or "\n\n",
+    )
+
+
+def _read_cached_parse(digest: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(PARSE_CACHE_DIR, f"{digest}.json")
+    try:
+        with open(path, "rb") as f:
+            entry = from_json(f.read())
+        # the modification time orders the entries for pruning
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        warnings.warn(f"Ignoring unreadable parse cache entry {digest}: {e}")
+        return None
+    return entry
+
+
+def _write_cached_parse(digest: str, entry: Dict[str, Any]) -> None:
+    os.makedirs(PARSE_CACHE_DIR, exist_ok=True)
+    path = os.path.join(PARSE_CACHE_DIR, f"{digest}.json")
+    # write then rename, so the other process never reads a partial entry
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(to_json(entry))
+    os.replace(tmp_path, path)
+    _prune_cached_parses()
+
+
+def _prune_cached_parses() -> None:
+    entries: List[Tuple[float, str]] = []
+    with os.scandir(PARSE_CACHE_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                continue  # pruned by the other process in the meantime
+    entries.sort()
+    for _, path in entries[: max(len(entries) - PARSE_CACHE_MAX_FILES, 0)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+async def _aparse(file_path: str, refresh: bool = False) -> Tuple[JobResult, bool]:
+    # the same upload is parsed for its text (MCP server) and again for its images
+    # and tables (streamlit), from different temporary files: reuse the first parse.
+    # Also returns whether the result came from the cache.
+    digest = await asyncio.to_thread(_file_digest, file_path)
+    entry = None if refresh else _PARSE_CACHE.get(digest)
+    if entry is None and not refresh:
+        entry = await asyncio.to_thread(_read_cached_parse, digest)
+    cached = entry is not None
+    if entry is None:
+        entry = _parse_entry(await _get_parser().aparse(file_path=file_path))
+        await asyncio.to_thread(_write_cached_parse, digest, entry)
+    _PARSE_CACHE[digest] = entry
+    _PARSE_CACHE.move_to_end(digest)
+    if len(_PARSE_CACHE) > PARSE_CACHE_SIZE:
+        _PARSE_CACHE.popitem(last=False)
+    return _job_result(entry), cached
 
 
 async def parse_file(
-    file_path: str, with_images: bool = False, with_tables: bool = False
+    file_path: str,
+    with_images: bool = False,
+    with_tables: bool = False,
 ) -> Union[Tuple[Optional[str], Optional[List[str]], Optional[List[pd.DataFrame]]]]:
     images: Optional[List[str]] = None
     text: Optional[str] = None
     tables: Optional[List[pd.DataFrame]] = None
-    document = await PARSER.aparse(file_path=file_path)
+    document, cached = await _aparse(file_path=file_path)
     md_content = await document.aget_markdown_documents()
-    if len(md_content) != 0:
-        text = "\n\n---\n\n".join([doc.text for doc in md_content])
+    if md_content:
+        text = "\n\n---\n\n".join(doc.text for doc in md_content)
     if with_images:
-        rename_and_remove_past_images()
-        imgs = await document.asave_all_images("static/")
-        images = rename_and_remove_current_images(imgs)
+        await _arename_and_remove_past_images()
+        try:
+            imgs = await document.asave_all_images("static/")
+        except httpx.HTTPStatusError:
+            if not cached:
+                raise
+            # the images are downloaded from the parse job, which LlamaCloud only
+            # keeps for a while: a cached parse can outlive it, so parse again
+            document, _ = await _aparse(file_path=file_path, refresh=True)
+            imgs = await document.asave_all_images("static/")
+        images = await _arename_and_remove_current_images(imgs)
     if with_tables:
         if text is not None:
             analyzer = MarkdownTextAnalyzer(text)
             md_tables = analyzer.identify_tables()["Table"]
             tables = []
-            for md_table in md_tables:
+            table_paths = []
+            timestamp = _timestamp()
+            for i, md_table in enumerate(md_tables):
                 table = md_table_to_pd_dataframe(md_table=md_table)
                 if table is not None:
                     tables.append(table)
-                    os.makedirs("data/extracted_tables/", exist_ok=True)
-                    table.to_csv(
-                        f"data/extracted_tables/table_{datetime.now().strftime('%Y_%d_%m_%H_%M_%S_%f')[:-3]}.csv",
-                        index=False,
+                    table_paths.append(
+                        f"data/extracted_tables/table_{timestamp}_{i}.csv"
                     )
+            if tables:
+                os.makedirs("data/extracted_tables/", exist_ok=True)
+                # write the CSV files in threads, off the event loop
+                await asyncio.gather(
+                    *(
+                        asyncio.to_thread(table.to_csv, table_path, index=False)
+                        for table, table_path in zip(tables, table_paths)
+                    )
+                )
     return text, images, tables
 
 
 async def process_file(
     filename: str,
 ) -> Union[Tuple[str, None], Tuple[None, None], Tuple[str, str]]:
+    client = _get_client()
     with open(filename, "rb") as f:
-        file = await CLIENT.files.upload_file(upload_file=f)
+        file = await client.files.upload_file(upload_file=f)
     files = [{"file_id": file.id}]
-    await CLIENT.pipelines.add_files_to_pipeline_api(
+    await client.pipelines.add_files_to_pipeline_api(
         pipeline_id=PIPELINE_ID, request=files
     )
     text, _, _ = await parse_file(file_path=filename)
     if text is None:
         return None, None
-    extraction_output = await EXTRACT_AGENT.aextract(
+    extraction_output = await _get_extract_agent().aextract(
         files=SourceText(text_content=text, filename=file.name)
     )
     if extraction_output:
-        return json.dumps(extraction_output.data, indent=4), text
+        return to_json(extraction_output.data, indent=4).decode(), text
     return None, None
 
 
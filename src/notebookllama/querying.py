@@ -1,43 +1,105 @@
 from dotenv import load_dotenv
+import hashlib
 import os
+import time
+from collections import OrderedDict
+from functools import lru_cache
 
+from llama_cloud import ManagedIngestionStatus
+from llama_cloud.client import AsyncLlamaCloud
 from llama_index.core.query_engine import CitationQueryEngine
 from llama_index.core.base.response.schema import Response
 from llama_index.indices.managed.llama_cloud import LlamaCloudIndex
 from llama_index.llms.openai import OpenAIResponses
-from typing import Union, cast
+from typing import Tuple, Union, cast
 
 load_dotenv()
 
-if (
-    os.getenv("LLAMACLOUD_API_KEY", None)
-    and os.getenv("LLAMACLOUD_PIPELINE_ID", None)
-    and os.getenv("OPENAI_API_KEY", None)
-):
-    LLM = OpenAIResponses(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"))
-    PIPELINE_ID = os.getenv("LLAMACLOUD_PIPELINE_ID")
-    RETR = LlamaCloudIndex(
+PIPELINE_ID = os.getenv("LLAMACLOUD_PIPELINE_ID")
+QUERY_CACHE_SIZE = 512
+QUERY_CACHE_TTL = 600.0
+
+# recent answers, keyed by the hash of the question: (time of the answer, answer)
+_QUERY_CACHE: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+# bumped whenever files are added to the index, answers computed before are not cached
+_index_generation = 0
+# set while LlamaCloud may still be ingesting the files added last
+_ingestion_pending = False
+_PENDING_STATUSES = (
+    ManagedIngestionStatus.NOT_STARTED,
+    ManagedIngestionStatus.IN_PROGRESS,
+)
+
+
+@lru_cache(maxsize=1)
+def _get_client() -> AsyncLlamaCloud:
+    return AsyncLlamaCloud(token=os.getenv("LLAMACLOUD_API_KEY"))
+
+
+# the query engine is built on first use, so that importing the module stays cheap
+@lru_cache(maxsize=1)
+def _get_query_engine() -> CitationQueryEngine:
+    llm = OpenAIResponses(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"))
+    retriever = LlamaCloudIndex(
         api_key=os.getenv("LLAMACLOUD_API_KEY"), pipeline_id=PIPELINE_ID
     ).as_retriever()
-    QE = CitationQueryEngine(
-        retriever=RETR,
-        llm=LLM,
+    return CitationQueryEngine(
+        retriever=retriever,
+        llm=llm,
         citation_chunk_size=256,
         citation_chunk_overlap=50,
     )
 
 
+def clear_query_cache() -> None:
+    _QUERY_CACHE.clear()
+
+
+def mark_index_updated() -> None:
+    # files were added to the pipeline: cached answers are stale, and answers stay
+    # uncached until LlamaCloud reports the ingestion of those files complete
+    global _index_generation, _ingestion_pending
+    _index_generation += 1
+    _ingestion_pending = True
+    clear_query_cache()
+
+
+async def _index_is_current() -> bool:
+    global _ingestion_pending
+    if not _ingestion_pending:
+        return True
+    status = await _get_client().pipelines.get_pipeline_status(pipeline_id=PIPELINE_ID)
+    if status.status in _PENDING_STATUSES:
+        return False
+    _ingestion_pending = False
+    return True
+
+
 async def query_index(question: str) -> Union[str, None]:
-    response = await QE.aquery(question)
+    key = hashlib.blake2b(question.encode(), digest_size=16).hexdigest()
+    cached = _QUERY_CACHE.get(key)
+    if cached is not None and time.monotonic() - cached[0] < QUERY_CACHE_TTL:
+        _QUERY_CACHE.move_to_end(key)
+        return cached[1]
+    # checked before the query: an answer is only cached if the index it was
+    # computed from already contained every file added so far
+    generation = _index_generation
+    cacheable = await _index_is_current()
+    answer = await _query_index(question)
+    if answer is not None and cacheable and generation == _index_generation:
+        _QUERY_CACHE[key] = (time.monotonic(), answer)
+        _QUERY_CACHE.move_to_end(key)
+        if len(_QUERY_CACHE) > QUERY_CACHE_SIZE:
+            _QUERY_CACHE.popitem(last=False)
+    return answer
+
+
+async def _query_index(question: str) -> Union[str, None]:
+    response = await _get_query_engine().aquery(question)
     response = cast(Response, response)
-    sources = []
     if not response.response:
         return None
-    if response.source_nodes is not None:
-        sources = [node.text for node in response.source_nodes]
-    return (
-        "## Answer\n\n"
-        + response.response
-        + "\n\n## Sources\n\n- "
-        + "\n- ".join(sources)
-    )
+    # citation chunks often repeat, keep each source once and in order
+    sources = dict.fromkeys(node.text for node in response.source_nodes or ())
+    sources_list = "\n- ".join(sources)
+    return f"## Answer\n\n{response.response}\n\n## Sources\n\n- {sources_list}"
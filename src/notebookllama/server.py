@@ -17,7 +17,7 @@ if not ENABLE_OBSERVABILITY:
 else:
     print("📊 OpenTelemetry enabled (server)")
 
-from querying import query_index
+from querying import mark_index_updated, query_index
 from processing import process_file
 from mindmap import get_mind_map
 from fastmcp import FastMCP
@@ -33,7 +33,11 @@ mcp: FastMCP = FastMCP(name="MCP For NotebookLM")
 async def process_file_tool(
     filename: str,
 ) -> Union[str, Literal["Sorry, your file could not be processed."]]:
-    notebook_model, text = await process_file(filename=filename)
+    try:
+        notebook_model, text = await process_file(filename=filename)
+    finally:
+        # the file is added to the index before it is processed, even if that fails
+        mark_index_updated()
     if notebook_model is None:
         return "Sorry, your file could not be processed."
     if text is None:
@@ -1,9 +1,14 @@
 from dotenv import load_dotenv
-import json
+import asyncio
+import hashlib
 import os
+from collections import OrderedDict
+from functools import lru_cache
 
 from pydantic import BaseModel, Field, model_validator
+from pydantic_core import from_json
 from llama_index.core.llms import ChatMessage
+from llama_index.core.llms.structured_llm import StructuredLLM
 from llama_index.llms.openai import OpenAIResponses
 from typing import List, Tuple, Optional
 from typing_extensions import Self
@@ -29,22 +34,92 @@ class ClaimVerification(BaseModel):
         return self
 
 
-if os.getenv("OPENAI_API_KEY", None):
-    LLM = OpenAIResponses(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"))
-    LLM_VERIFIER = LLM.as_structured_llm(ClaimVerification)
+VERIFICATION_CACHE_SIZE = 256
+
+# recent verifications, keyed by the hash of the claim and of its sources
+_VERIFICATION_CACHE: "OrderedDict[str, Tuple[bool, Optional[List[str]]]]" = (
+    OrderedDict()
+)
+
+
+@lru_cache(maxsize=1)
+def _get_llm_verifier() -> StructuredLLM:
+    llm = OpenAIResponses(model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY"))
+    return llm.as_structured_llm(ClaimVerification)
+
+
+def _verification_message(claim: str, sources: str) -> ChatMessage:
+    return ChatMessage(
+        role="user",
+        content=f"I have this claim: {claim} that is allegedgly supported by these sources:\n\n'''\n{sources}\n'''\n\nCan you please tell me whether or not this claim is thrutful and, if it is, identify one to three passages in the sources specifically supporting the claim?",
+    )
+
+
+def _verification_key(claim: str, sources: str) -> str:
+    digest = hashlib.blake2b(claim.encode(), digest_size=16)
+    digest.update(b"\0")
+    digest.update(sources.encode())
+    return digest.hexdigest()
+
+
+def _cached_verification(key: str) -> Optional[Tuple[bool, Optional[List[str]]]]:
+    cached = _VERIFICATION_CACHE.get(key)
+    if cached is not None:
+        _VERIFICATION_CACHE.move_to_end(key)
+    return cached
+
+
+def _store_verification(key: str, content: str) -> Tuple[bool, Optional[List[str]]]:
+    # the structured LLM already validated its output against ClaimVerification
+    verification = ClaimVerification.model_construct(**from_json(content))
+    result = verification.claim_is_true, verification.supporting_citations
+    _VERIFICATION_CACHE[key] = result
+    if len(_VERIFICATION_CACHE) > VERIFICATION_CACHE_SIZE:
+        _VERIFICATION_CACHE.popitem(last=False)
+    return result
+
+
+async def averify_claims(
+    claims: List[str],
+    sources: str,
+    concurrency: int = 8,
+) -> List[Tuple[bool, Optional[List[str]]]]:
+    llm_verifier = _get_llm_verifier()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def verify(claim: str) -> Tuple[bool, Optional[List[str]]]:
+        key = _verification_key(claim=claim, sources=sources)
+        cached = _cached_verification(key)
+        if cached is not None:
+            return cached
+        async with semaphore:
+            response = await llm_verifier.achat(
+                [_verification_message(claim=claim, sources=sources)]
+            )
+        return _store_verification(key, response.message.content)
+
+    # claims are verified concurrently, results keep the order of the claims
+    return await asyncio.gather(*(verify(claim) for claim in claims))
+
+
+async def averify_claim(
+    claim: str,
+    sources: str,
+) -> Tuple[bool, Optional[List[str]]]:
+    return (await averify_claims(claims=[claim], sources=sources))[0]
 
 
 def verify_claim(
     claim: str,
     sources: str,
 ) -> Tuple[bool, Optional[List[str]]]:
-    response = LLM_VERIFIER.chat(
-        [
-            ChatMessage(
-                role="user",
-                content=f"I have this claim: {claim} that is allegedgly supported by these sources:\n\n'''\n{sources}\n'''\n\nCan you please tell me whether or not this claim is thrutful and, if it is, identify one to three passages in the sources specifically supporting the claim?",
-            )
-        ]
+    # sync client on purpose: asyncio.run(averify_claim(...)) per call would reuse
+    # the cached async client across event loops, the first of which is closed
+    key = _verification_key(claim=claim, sources=sources)
+    cached = _cached_verification(key)
+    if cached is not None:
+        return cached
+    response = _get_llm_verifier().chat(
+        [_verification_message(claim=claim, sources=sources)]
     )
-    response_json = json.loads(response.message.content)
-    return response_json["claim_is_true"], response_json["supporting_citations"]
+    return _store_verification(key, response.message.content)
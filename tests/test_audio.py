@@ -1,6 +1,9 @@
+import asyncio
 import pytest
 
 from elevenlabs import AsyncElevenLabs
+from pydub import AudioSegment
+from src.notebookllama import audio
 from src.notebookllama.audio import (
     PodcastGenerator,
     MultiTurnConversation,
@@ -10,8 +13,9 @@ from src.notebookllama.audio import (
     PodcastGeneratorError,
 )
 from llama_index.core.llms.structured_llm import StructuredLLM
-from llama_index.core.llms import MockLLM
+from llama_index.core.llms import ChatMessage, ChatResponse, MockLLM
 from pydantic import BaseModel, ValidationError
+from typing import AsyncIterator
 
 
 class MockElevenLabs(AsyncElevenLabs):
@@ -19,6 +23,33 @@ class MockElevenLabs(AsyncElevenLabs):
         self.test_api_key = test_api_key
 
 
+class MockTextToSpeech:
+    def __init__(self) -> None:
+        self.active = 0
+        self.max_active = 0
+
+    async def _stream(self, text: str) -> AsyncIterator[bytes]:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        # longer turns take less time, so that requests finish out of order
+        await asyncio.sleep(0.05 / len(text))
+        self.active -= 1
+        yield text.encode()
+
+    def convert(self, voice_id: str, text: str, **kwargs) -> AsyncIterator[bytes]:
+        return self._stream(text)
+
+
+class MockTTSElevenLabs(MockElevenLabs):
+    def __init__(self, test_api_key: str) -> None:
+        super().__init__(test_api_key=test_api_key)
+        self.tts = MockTextToSpeech()
+
+    @property
+    def text_to_speech(self) -> MockTextToSpeech:
+        return self.tts
+
+
 class DataModel(BaseModel):
     test: str
 
@@ -205,9 +236,238 @@ def test_build_conversation_prompt_all_audiences(correct_structured_llm: Structu
         assert expected_instruction in prompt
 
 
+def test_build_conversation_prompt_stable_prefix(
+    correct_structured_llm: StructuredLLM,
+):
+    """Test that the transcript comes before any configuration-specific content"""
+    generator = PodcastGenerator(
+        client=MockElevenLabs(test_api_key="test"), llm=correct_structured_llm
+    )
+    transcript = "Shared transcript content"
+
+    prompt1 = generator._build_conversation_prompt(transcript, PodcastConfig())
+    prompt2 = generator._build_conversation_prompt(
+        transcript,
+        PodcastConfig(style="debate", tone="energetic", target_audience="expert"),
+    )
+
+    prefix_end = prompt1.index(transcript) + len(transcript)
+    assert prompt1[:prefix_end] == prompt2[:prefix_end]
+    assert prompt1.index("CONVERSATION STYLE") > prefix_end
+
+
+def test_build_conversation_prompt_topic_order(correct_structured_llm: StructuredLLM):
+    """Test that the order of the focus topics does not change the prompt"""
+    generator = PodcastGenerator(
+        client=MockElevenLabs(test_api_key="test"), llm=correct_structured_llm
+    )
+    config1 = PodcastConfig(focus_topics=["Machine Learning", "AI Ethics"])
+    config2 = PodcastConfig(focus_topics=["AI Ethics", "Machine Learning"])
+
+    assert generator._build_conversation_prompt(
+        "transcript", config1
+    ) == generator._build_conversation_prompt("transcript", config2)
+    assert generator._conversation_cache_key(
+        "transcript", config1
+    ) == generator._conversation_cache_key("transcript", config2)
+
+
 @pytest.fixture()
 def sample_podcast_generator(correct_structured_llm: StructuredLLM) -> PodcastGenerator:
     """Fixture providing a configured PodcastGenerator for testing"""
     return PodcastGenerator(
         client=MockElevenLabs(test_api_key="test"), llm=correct_structured_llm
     )
+
+
+@pytest.mark.asyncio
+async def test_stream_turns_audio_concurrently(
+    correct_structured_llm: StructuredLLM,
+) -> None:
+    """Test that turns are synthesized concurrently and audio keeps the turn order"""
+    client = MockTTSElevenLabs(test_api_key="test")
+    generator = PodcastGenerator(client=client, llm=correct_structured_llm)
+    conversation = MultiTurnConversation.model_validate(
+        {
+            "conversation": [
+                {"speaker": "speaker1" if i % 2 == 0 else "speaker2", "content": c}
+                for i, c in enumerate(["a", "bb", "ccc", "dddd", "eeeee"])
+            ]
+        }
+    )
+    config = PodcastConfig(voice_config={"max_concurrent_requests": 2})
+
+    turns_audio = [
+        audio async for audio in generator._stream_turns_audio(conversation, config)
+    ]
+
+    assert turns_audio == [b"a", b"bb", b"ccc", b"dddd", b"eeeee"]
+    assert client.tts.max_active == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_turns_audio_error(
+    correct_structured_llm: StructuredLLM, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that a failed turn stops the stream instead of blocking it"""
+    generator = PodcastGenerator(
+        client=MockTTSElevenLabs(test_api_key="test"), llm=correct_structured_llm
+    )
+    conversation = MultiTurnConversation.model_validate(
+        {
+            "conversation": [
+                {"speaker": "speaker1", "content": "a"},
+                {"speaker": "speaker2", "content": "fail"},
+                {"speaker": "speaker1", "content": "c"},
+            ]
+        }
+    )
+    synthesize_turn = generator._synthesize_turn
+
+    async def failing_synthesize_turn(turn, config, semaphore) -> bytes:
+        if turn.content == "fail":
+            raise AudioGenerationError("Failed to generate speech for text: fail")
+        return await synthesize_turn(turn, config, semaphore)
+
+    monkeypatch.setattr(generator, "_synthesize_turn", failing_synthesize_turn)
+    with pytest.raises(AudioGenerationError):
+        async for _ in generator._stream_turns_audio(conversation, PodcastConfig()):
+            pass
+
+
+def test_concatenate_segments() -> None:
+    """Test that segments are joined in order and aligned to the first segment"""
+    first = AudioSegment.silent(duration=100, frame_rate=22050)
+    second = AudioSegment.silent(duration=200, frame_rate=44100).set_channels(2)
+    third = AudioSegment.silent(duration=300, frame_rate=22050)
+
+    combined = PodcastGenerator._concatenate_segments([first, second, third])
+
+    assert combined.frame_rate == 22050
+    assert combined.channels == 1
+    assert combined.sample_width == first.sample_width
+    assert len(combined) == 600
+    assert combined.raw_data.startswith(first.raw_data)
+    assert len(PodcastGenerator._concatenate_segments([])) == 0
+
+
+@pytest.mark.asyncio
+async def test_remux_mp3(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that MP3 streams are written to a single stream copy as they arrive"""
+    calls = []
+
+    class FakeStdin:
+        def __init__(self) -> None:
+            self.data = bytearray()
+
+        def write(self, data: bytes) -> None:
+            self.data.extend(data)
+
+        async def drain(self) -> None:
+            pass
+
+    class FakeProcess:
+        returncode = 0
+
+        def __init__(self) -> None:
+            self.stdin = FakeStdin()
+
+        async def communicate(self) -> tuple:
+            return None, b""
+
+        async def wait(self) -> int:
+            return self.returncode
+
+    async def fake_create_subprocess_exec(*command: str, **kwargs) -> FakeProcess:
+        process = FakeProcess()
+        calls.append((list(command), process))
+        return process
+
+    async def turns_audio() -> AsyncIterator[bytes]:
+        yield b"first"
+        yield b"second"
+
+    monkeypatch.setattr(
+        audio.asyncio, "create_subprocess_exec", fake_create_subprocess_exec
+    )
+    await PodcastGenerator._remux_mp3(turns_audio(), "out.mp3")
+
+    assert len(calls) == 1
+    command, process = calls[0]
+    assert command[-3:] == ["-c", "copy", "out.mp3"]
+    assert process.stdin.data == b"firstsecond"
+
+
+@pytest.mark.asyncio
+async def test_conversation_script_cache(
+    correct_structured_llm: StructuredLLM, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that conversation scripts are reused for the same transcript and settings"""
+    calls = []
+    script = MultiTurnConversation(
+        conversation=[
+            {"speaker": "speaker1", "content": "Hello"},
+            {"speaker": "speaker2", "content": "Hi"},
+            {"speaker": "speaker1", "content": "Bye"},
+        ]
+    )
+
+    async def fake_achat(self, messages, **kwargs) -> ChatResponse:
+        calls.append(messages)
+        return ChatResponse(
+            message=ChatMessage(role="assistant", content=script.model_dump_json())
+        )
+
+    monkeypatch.setattr(StructuredLLM, "achat", fake_achat)
+    generator = PodcastGenerator(
+        client=MockElevenLabs(test_api_key="test"),
+        llm=correct_structured_llm,
+        conversation_cache_size=1,
+    )
+
+    first = await generator._conversation_script("transcript", PodcastConfig())
+    # audio settings do not change the script
+    second = await generator._conversation_script(
+        "transcript", PodcastConfig(voice_config={"model_id": "other"})
+    )
+    assert first == second == script
+    assert len(calls) == 1
+
+    await generator._conversation_script("transcript", PodcastConfig(tone="casual"))
+    assert len(calls) == 2
+    # the oldest entry was evicted
+    await generator._conversation_script("transcript", PodcastConfig())
+    assert len(calls) == 3
+
+    generator.cache_conversations = False
+    await generator._conversation_script("transcript", PodcastConfig())
+    assert len(calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_conversation_audio_pcm(
+    correct_structured_llm: StructuredLLM, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that PCM turns are joined and encoded once"""
+    exported = []
+
+    def fake_export(self: AudioSegment, out_f: str, **kwargs) -> None:
+        exported.append((self.raw_data, self.frame_rate, out_f, kwargs["format"]))
+
+    monkeypatch.setattr(AudioSegment, "export", fake_export)
+    generator = PodcastGenerator(
+        client=MockTTSElevenLabs(test_api_key="test"), llm=correct_structured_llm
+    )
+    conversation = MultiTurnConversation.model_validate(
+        {
+            "conversation": [
+                {"speaker": "speaker1", "content": "aa"},
+                {"speaker": "speaker2", "content": "bbbb"},
+                {"speaker": "speaker1", "content": "cc"},
+            ]
+        }
+    )
+
+    output_path = await generator._conversation_audio(conversation, PodcastConfig())
+
+    assert exported == [(b"aabbbbcc", 22050, output_path, "mp3")]
@@ -94,6 +94,9 @@ def test_mind_map() -> None:
     assert m1.nodes[0].content == "Auxin is released"
     assert m1.edges[0].from_id == "A"
     assert m1.edges[0].to_id == "B"
+    with pytest.raises(ValidationError):
+        m1.nodes[0].content = "Auxin"
+    assert len({Edge(from_id="A", to_id="B"), m1.edges[0]}) == 1
 
     with pytest.raises(ValidationError):
         MindMap(
@@ -109,6 +112,19 @@ def test_mind_map() -> None:
             ],
         )
 
+    with pytest.raises(ValidationError):
+        MindMap(
+            nodes=[
+                Node(id="A", content="Auxin is released"),
+                Node(id="B", content="Travels to the roots"),
+                Node(id="C", content="Root cells grow"),
+            ],
+            edges=[
+                Edge(from_id="A", to_id="B"),
+                Edge(from_id="E", to_id="A"),  # "E" does not exist, "C" is isolated
+            ],
+        )
+
 
 def test_multi_turn_conversation() -> None:
     turns = [
@@ -154,8 +170,9 @@ def test_multi_turn_conversation() -> None:
         MultiTurnConversation(conversation=wrong_turns1)
     with pytest.raises(ValidationError):
         MultiTurnConversation(conversation=wrong_turns2)
-    with pytest.raises(ValidationError):
+    with pytest.raises(ValidationError) as exc_info:
         MultiTurnConversation(conversation=wrong_turns3)
+    assert exc_info.value.errors()[0]["type"] == "speaker_order"
 
 
 def test_claim_verification() -> None:
@@ -212,7 +229,7 @@ def test_voice_config_defaults():
     assert config.speaker1_voice_id == "nPczCjzI2devNBz1zQrb"
     assert config.speaker2_voice_id == "Xb7hH8MSUJpSbSDYk0k2"
     assert config.model_id == "eleven_turbo_v2_5"
-    assert config.output_format == "mp3_22050_32"
+    assert config.output_format == "pcm_22050"
 
 
 def test_voice_config_custom_values():
@@ -276,7 +293,7 @@ def test_podcast_config_custom_values():
 
     assert config.style == "interview"
     assert config.tone == "professional"
-    assert config.focus_topics == focus_topics
+    assert config.focus_topics == sorted(focus_topics)
     assert config.target_audience == "expert"
     assert config.custom_prompt == custom_prompt
     assert config.speaker1_role == "interviewer"
@@ -297,6 +314,11 @@ def test_podcast_config_validation():
     with pytest.raises(ValidationError):
         PodcastConfig(target_audience="invalid_audience")
 
+    # Test that the configuration is immutable
+    config = PodcastConfig()
+    with pytest.raises(ValidationError):
+        config.style = "debate"
+
 
 def test_conversation_turn():
     """Test ConversationTurn model"""
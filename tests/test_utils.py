@@ -1,19 +1,33 @@
 import pytest
+import asyncio
+import httpx
 import os
 import pandas as pd
+from collections import OrderedDict
 from pathlib import Path
+from types import SimpleNamespace
 from dotenv import load_dotenv
 
-from typing import Callable
+from typing import Callable, List
 from pydantic import ValidationError
+from llama_index.core.base.response.schema import Response
+from llama_index.core.schema import NodeWithScore, TextNode
+from llama_index.core.llms import ChatMessage, ChatResponse
+from llama_cloud import ManagedIngestionStatus, ManagedIngestionStatusResponse
+from llama_cloud_services.parse.types import JobResult
+from src.notebookllama import processing
 from src.notebookllama.processing import (
+    parse_file,
     process_file,
     md_table_to_pd_dataframe,
     rename_and_remove_current_images,
     rename_and_remove_past_images,
     MarkdownTextAnalyzer,
+    _arename_and_remove_current_images,
+    _arename_and_remove_past_images,
 )
-from src.notebookllama.mindmap import get_mind_map
+from src.notebookllama import mindmap, querying, verifying
+from src.notebookllama.mindmap import Edge, MindMap, Node, get_mind_map
 from src.notebookllama.models import Notebook
 
 load_dotenv()
@@ -143,6 +157,47 @@ async def test_mind_map_creation(
     os.remove(test_mindmap)
 
 
+class MockMindMapLLM:
+    def __init__(self) -> None:
+        self.messages: List[List[ChatMessage]] = []
+
+    async def achat(self, messages: List[ChatMessage]) -> ChatResponse:
+        self.messages.append(messages)
+        mind_map = MindMap(
+            nodes=[Node(id="A", content="Brain"), Node(id="B", content="Neurons")],
+            edges=[Edge(from_id="A", to_id="B")],
+        )
+        return ChatResponse(
+            message=ChatMessage(role="assistant", content=mind_map.model_dump_json())
+        )
+
+
+@pytest.mark.asyncio
+async def test_mind_map_from_structured_output(
+    monkeypatch: pytest.MonkeyPatch,
+    notebook_to_process: Notebook,
+    file_exists_fn: Callable[[str], bool],
+    tmp_path: Path,
+) -> None:
+    # pyvis writes its assets next to the graph
+    monkeypatch.chdir(tmp_path)
+    llm = MockMindMapLLM()
+    monkeypatch.setattr(mindmap, "_get_llm_struct", lambda: llm)
+    test_mindmap = await get_mind_map(
+        summary=notebook_to_process.summary, highlights=notebook_to_process.highlights
+    )
+    assert test_mindmap is not None
+    assert file_exists_fn(test_mindmap)
+    with open(test_mindmap) as f:
+        assert "Neurons" in f.read()
+    system_message, user_message = llm.messages[0]
+    assert system_message.content == mindmap.MIND_MAP_SYSTEM_PROMPT
+    assert notebook_to_process.summary in user_message.content
+    assert user_message.content.endswith(
+        "".join(f"\n- {highlight}" for highlight in notebook_to_process.highlights)
+    )
+
+
 @pytest.mark.skipif(
     condition=skip_condition,
     reason="You do not have the necessary env variables to run this test.",
@@ -174,6 +229,142 @@ def test_table_to_dataframe(
         assert df.equals(dataframe_from_tables)
 
 
+def test_table_to_dataframe_ragged_rows() -> None:
+    df = md_table_to_pd_dataframe({"header": ["a", "b"], "rows": [["1", "2"], ["3"]]})
+    assert df is not None
+    assert df.shape == (2, 2)
+    assert df["a"].tolist() == ["1", "3"]
+    assert pd.isna(df["b"][1])
+    with pytest.warns(UserWarning):
+        assert md_table_to_pd_dataframe({"header": ["a"], "rows": [["1", "2"]]}) is None
+
+
+class MockVerifier:
+    def __init__(self) -> None:
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+
+    async def achat(self, messages: List[ChatMessage]) -> ChatResponse:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return self.chat(messages)
+
+    def chat(self, messages: List[ChatMessage]) -> ChatResponse:
+        self.calls += 1
+        claim_is_true = "true claim" in messages[0].content
+        claim = verifying.ClaimVerification(
+            claim_is_true=claim_is_true,
+            supporting_citations=["A citation"] if claim_is_true else None,
+        )
+        return ChatResponse(
+            message=ChatMessage(role="assistant", content=claim.model_dump_json())
+        )
+
+
+@pytest.mark.asyncio
+async def test_verify_claims_concurrently(monkeypatch: pytest.MonkeyPatch) -> None:
+    verifier = MockVerifier()
+    monkeypatch.setattr(verifying, "_get_llm_verifier", lambda: verifier)
+    monkeypatch.setattr(verifying, "_VERIFICATION_CACHE", OrderedDict())
+    claims = [f"a true claim {i}" for i in range(3)] + ["a false claim"]
+    results = await verifying.averify_claims(
+        claims=claims, sources="sources", concurrency=2
+    )
+    assert results == [(True, ["A citation"])] * 3 + [(False, None)]
+    assert verifier.max_active == 2
+    assert verifier.calls == 4
+    # verified claims are answered from the cache
+    await verifying.averify_claims(claims=claims[:2], sources="sources")
+    assert verifier.calls == 4
+    await verifying.averify_claims(claims=claims[:1], sources="other sources")
+    assert verifier.calls == 5
+    assert await verifying.averify_claim(
+        claim="a false claim", sources="other sources"
+    ) == (False, None)
+    assert verifier.calls == 6
+
+
+def test_verify_claim_sync(monkeypatch: pytest.MonkeyPatch) -> None:
+    verifier = MockVerifier()
+    monkeypatch.setattr(verifying, "_get_llm_verifier", lambda: verifier)
+    monkeypatch.setattr(verifying, "_VERIFICATION_CACHE", OrderedDict())
+    # repeated sync calls never start an event loop, and share the cache
+    for _ in range(2):
+        assert verifying.verify_claim(claim="a true claim", sources="sources") == (
+            True,
+            ["A citation"],
+        )
+    assert verifier.calls == 1
+    assert verifier.max_active == 0
+
+
+class MockQueryEngine:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def aquery(self, question: str) -> Response:
+        self.calls += 1
+        source_nodes = [
+            NodeWithScore(node=TextNode(text=text))
+            for text in ("Neurons", "Cortex", "Neurons")
+        ]
+        return Response(response=f"Answer to {question}", source_nodes=source_nodes)
+
+
+@pytest.mark.asyncio
+async def test_query_index_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    query_engine = MockQueryEngine()
+    monkeypatch.setattr(querying, "_get_query_engine", lambda: query_engine)
+    monkeypatch.setattr(querying, "_QUERY_CACHE", OrderedDict())
+    answer = await querying.query_index("What is the brain?")
+    assert answer == (
+        "## Answer\n\nAnswer to What is the brain?\n\n## Sources\n\n- Neurons\n- Cortex"
+    )
+    assert await querying.query_index("What is the brain?") == answer
+    assert query_engine.calls == 1
+    querying.clear_query_cache()
+    await querying.query_index("What is the brain?")
+    assert query_engine.calls == 2
+    monkeypatch.setattr(querying, "QUERY_CACHE_TTL", 0.0)
+    await querying.query_index("What is the brain?")
+    assert query_engine.calls == 3
+
+
+class MockPipelines:
+    def __init__(self) -> None:
+        self.status = ManagedIngestionStatus.IN_PROGRESS
+
+    async def get_pipeline_status(
+        self, pipeline_id: str
+    ) -> ManagedIngestionStatusResponse:
+        return ManagedIngestionStatusResponse(status=self.status)
+
+
+@pytest.mark.asyncio
+async def test_query_index_not_cached_during_ingestion(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    query_engine = MockQueryEngine()
+    client = SimpleNamespace(pipelines=MockPipelines())
+    monkeypatch.setattr(querying, "_get_query_engine", lambda: query_engine)
+    monkeypatch.setattr(querying, "_get_client", lambda: client)
+    monkeypatch.setattr(querying, "_QUERY_CACHE", OrderedDict())
+    monkeypatch.setattr(querying, "_ingestion_pending", False)
+    await querying.query_index("What is the brain?")
+    querying.mark_index_updated()
+    # answers from before the new file is ingested are not cached
+    await querying.query_index("What is the brain?")
+    await querying.query_index("What is the brain?")
+    assert query_engine.calls == 3
+    client.pipelines.status = ManagedIngestionStatus.SUCCESS
+    await querying.query_index("What is the brain?")
+    await querying.query_index("What is the brain?")
+    assert query_engine.calls == 4
+
+
 def test_images_renaming(images_dir: str):
     images = [os.path.join(images_dir, f) for f in os.listdir(images_dir)]
     imgs = rename_and_remove_current_images(images)
@@ -189,3 +380,143 @@ def test_images_renaming(images_dir: str):
         with open(images_dir + "image.png", "wb") as wb:
             wb.write(bts)
         os.remove(image)
+
+
+@pytest.mark.asyncio
+async def test_images_renaming_concurrently(tmp_path: Path) -> None:
+    images = []
+    for name in ("first.png", "second.png"):
+        (tmp_path / name).write_bytes(name.encode())
+        images.append(str(tmp_path / name))
+    imgs = await _arename_and_remove_current_images(images)
+    assert imgs == [
+        str(tmp_path / "first_current.png"),
+        str(tmp_path / "second_current.png"),
+    ]
+    assert sorted(os.listdir(tmp_path)) == ["first_current.png", "second_current.png"]
+    renamed = await _arename_and_remove_past_images(str(tmp_path))
+    assert len(renamed) == 2
+    assert all("_at_" in img and "_current" not in img for img in renamed)
+    assert sorted(Path(img).read_bytes() for img in renamed) == [
+        b"first.png",
+        b"second.png",
+    ]
+
+
+class MockParser:
+    api_key = "fake"
+    base_url = "https://example.invalid"
+    page_separator = None
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.calls = 0
+
+    async def aparse(self, file_path: str) -> JobResult:
+        self.calls += 1
+        return JobResult(
+            job_id=f"job-{self.calls}",
+            file_name=file_path,
+            job_result={"pages": [{"page": 1, "md": self.text}]},
+        )
+
+
+@pytest.mark.asyncio
+async def test_parse_file_tables(
+    monkeypatch: pytest.MonkeyPatch,
+    markdown_file: str,
+    dataframe_from_tables: pd.DataFrame,
+    tmp_path: Path,
+) -> None:
+    with open(markdown_file, "r") as f:
+        text = f.read()
+    monkeypatch.setattr(processing, "_get_parser", lambda: MockParser(text))
+    monkeypatch.setattr(processing, "_PARSE_CACHE", OrderedDict())
+    monkeypatch.setattr(processing, "PARSE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    Path("doc.pdf").write_bytes(b"pdf")
+    parsed_text, images, tables = await parse_file("doc.pdf", with_tables=True)
+    assert parsed_text == text
+    assert images is None
+    assert tables is not None and len(tables) == 2
+    csv_files = sorted(os.listdir("data/extracted_tables/"))
+    assert len(csv_files) == 2
+    for csv_file in csv_files:
+        df = pd.read_csv(os.path.join("data/extracted_tables/", csv_file), dtype=str)
+        assert df.equals(dataframe_from_tables)
+
+
+@pytest.mark.asyncio
+async def test_parse_file_reuses_parse(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    parser = MockParser("# Title")
+    monkeypatch.setattr(processing, "_get_parser", lambda: parser)
+    monkeypatch.setattr(processing, "_PARSE_CACHE", OrderedDict())
+    monkeypatch.setattr(processing, "PARSE_CACHE_DIR", str(tmp_path / "cache"))
+    first, second, other = tmp_path / "a.pdf", tmp_path / "b.pdf", tmp_path / "c.pdf"
+    first.write_bytes(b"same content")
+    second.write_bytes(b"same content")
+    other.write_bytes(b"other content")
+    assert (await parse_file(str(first)))[0] == "# Title"
+    assert (await parse_file(str(second)))[0] == "# Title"
+    assert parser.calls == 1
+    await parse_file(str(other))
+    assert parser.calls == 2
+    # another process starts with an empty memory cache and reads the parse from disk
+    monkeypatch.setattr(processing, "_PARSE_CACHE", OrderedDict())
+    assert (await parse_file(str(second)))[0] == "# Title"
+    assert parser.calls == 2
+    assert processing._PARSE_CACHE.popitem()[1]["job_id"] == "job-1"
+    # every call gets its own JobResult, and so its own httpx client
+    first_result, _ = await processing._aparse(str(first))
+    second_result, cached = await processing._aparse(str(first))
+    assert cached and first_result is not second_result
+
+
+@pytest.mark.asyncio
+async def test_parse_file_reparses_expired_jobs(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    parser = MockParser("# Title")
+    monkeypatch.setattr(processing, "_get_parser", lambda: parser)
+    monkeypatch.setattr(processing, "_PARSE_CACHE", OrderedDict())
+    monkeypatch.setattr(processing, "PARSE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+
+    async def asave_all_images(self: JobResult, output_dir: str) -> List[str]:
+        if self.job_id == "job-1":
+            request = httpx.Request("GET", "https://example.invalid")
+            raise httpx.HTTPStatusError(
+                "job expired", request=request, response=httpx.Response(404)
+            )
+        return []
+
+    monkeypatch.setattr(JobResult, "asave_all_images", asave_all_images)
+    Path("doc.pdf").write_bytes(b"pdf")
+    await parse_file("doc.pdf")
+    _, images, _ = await parse_file("doc.pdf", with_images=True)
+    assert images == []
+    assert parser.calls == 2
+    assert processing._PARSE_CACHE.popitem()[1]["job_id"] == "job-2"
+
+
+@pytest.mark.asyncio
+async def test_parse_cache_is_pruned(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    parser = MockParser("# Title")
+    monkeypatch.setattr(processing, "_get_parser", lambda: parser)
+    monkeypatch.setattr(processing, "_PARSE_CACHE", OrderedDict())
+    monkeypatch.setattr(processing, "PARSE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(processing, "PARSE_CACHE_MAX_FILES", 2)
+    cache_dir = tmp_path / "cache"
+    digests = []
+    for i in range(3):
+        file = tmp_path / f"{i}.pdf"
+        file.write_bytes(f"content {i}".encode())
+        await parse_file(str(file))
+        digests.append(processing._file_digest(str(file)))
+        # distinct modification times, oldest first
+        os.utime(cache_dir / f"{digests[-1]}.json", (i, i))
+    assert sorted(os.listdir(cache_dir)) == sorted(f"{d}.json" for d in digests[1:])
@@ -1,3 +1,4 @@
 from .models import EmbeddingConfig
+from .bindings import COMMON_BINDINGS, SUBMIT_BINDING
 
-__all__ = ["EmbeddingConfig"]
+__all__ = ["EmbeddingConfig", "COMMON_BINDINGS", "SUBMIT_BINDING"]
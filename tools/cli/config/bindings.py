@@ -0,0 +1,10 @@
+from textual.binding import Binding
+
+# built once per process and shared by every screen
+QUIT_BINDING = Binding("ctrl+q", "quit", "Exit", key_display="ctrl+q")
+DARK_BINDING = Binding(
+    "ctrl+d", "toggle_dark", "Toggle Dark Theme", key_display="ctrl+d"
+)
+SUBMIT_BINDING = Binding("shift+enter", "submit", "Submit")
+
+COMMON_BINDINGS = (QUIT_BINDING, DARK_BINDING)
@@ -1,12 +1,19 @@
-from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Literal, Optional
 
+from pydantic import BaseModel, ConfigDict
 
-@dataclass
-class EmbeddingConfig:
-    provider: str
+Provider = Literal["", "OpenAI", "Cohere", "Bedrock", "HuggingFace", "Azure", "Gemini"]
+SetupType = Literal["default_settings", "custom_settings"]
+
+
+class EmbeddingConfig(BaseModel):
+    # validate on assignment, so a bad choice fails in the UI rather than in llama_cloud
+    model_config = ConfigDict(validate_assignment=True)
+
+    provider: Provider
+    setup_type: Optional[SetupType] = None
     api_key: Optional[str] = None
     model: Optional[str] = None
     region: Optional[str] = None
     key_id: Optional[str] = None
-    embedding_config: Optional[object] = None
+    embedding_config: Optional[Any] = None
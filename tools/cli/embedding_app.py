@@ -21,20 +21,14 @@ class EmbeddingSetupApp(App):
         self.exit(config)
 
     def handle_default_setup(self) -> None:
-        from llama_index.embeddings.openai import OpenAIEmbedding
-        from llama_cloud import PipelineCreateEmbeddingConfig_OpenaiEmbedding
+        from .screens.embedding_providers.openai import build_openai_embedding_config
 
         self.config.provider = "OpenAI"
         self.config.api_key = os.getenv("OPENAI_API_KEY")
         self.config.model = "text-embedding-3-small"
 
-        embed_model = OpenAIEmbedding(
-            model=self.config.model, api_key=self.config.api_key
+        self.config = build_openai_embedding_config(
+            self.config.model, self.config.api_key
         )
-        embedding_config = PipelineCreateEmbeddingConfig_OpenaiEmbedding(
-            type="OPENAI_EMBEDDING",
-            component=embed_model,
-        )
-        self.config = embedding_config
 
         self.handle_completion(self.config)
@@ -1,5 +1,20 @@
-from .base import BaseScreen, ConfigurationScreen
-from .initial import InitialScreen
-from .embedding_provider import ProviderSelectScreen
+import importlib
+from typing import Any
+
+# screens are imported on first access, so that importing the package stays cheap
+_LAZY = {
+    "BaseScreen": ".base",
+    "ConfigurationScreen": ".base",
+    "InitialScreen": ".initial",
+    "ProviderSelectScreen": ".embedding_provider",
+}
 
 __all__ = ["BaseScreen", "ConfigurationScreen", "InitialScreen", "ProviderSelectScreen"]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -2,26 +2,51 @@ from textual.app import ComposeResult
 from textual.containers import Container
 from textual.screen import Screen
 from textual.widgets import Label, Footer
-from textual.binding import Binding
-from textual.widgets import Input
+from textual.widgets import Input, Select
+from typing import Any, NamedTuple, Optional
+
+from ..config.bindings import COMMON_BINDINGS, SUBMIT_BINDING
+
+THEME_TOGGLE = {"textual-light": "textual-dark", "textual-dark": "textual-light"}
+
+# how long a screen ignores further navigation after it starts one
+NAVIGATION_GUARD = 0.3
+
+
+class FieldSpec(NamedTuple):
+    """Declarative description of a text input on a configuration form."""
+
+    id: str
+    placeholder: str
+    password: bool = False
 
 
 class BaseScreen(Screen):
     """Base screen with common functionality for all screens."""
 
-    BINDINGS = [
-        Binding("ctrl+q", "quit", "Exit", key_display="ctrl+q"),
-        Binding("ctrl+d", "toggle_dark", "Toggle Dark Theme", key_display="ctrl+d"),
-    ]
+    FORM_TITLE = "Base Screen"
+    BINDINGS = COMMON_BINDINGS
+
+    _navigating: bool = False
 
     def action_toggle_dark(self) -> None:
-        self.app.theme = (
-            "textual-dark" if self.app.theme == "textual-light" else "textual-light"
-        )
+        # any non-default theme falls back to light, as before
+        self.app.theme = THEME_TOGGLE.get(self.app.theme, "textual-light")
 
     def action_quit(self) -> None:
         self.app.exit()
 
+    def begin_navigation(self) -> bool:
+        """Return False while a navigation started by this screen is still settling."""
+        if self._navigating:
+            return False
+        self._navigating = True
+        self.set_timer(NAVIGATION_GUARD, self._end_navigation)
+        return True
+
+    def _end_navigation(self) -> None:
+        self._navigating = False
+
     def compose(self) -> ComposeResult:
         yield Container(
             Label(self.get_title(), classes="form-title"),
@@ -31,7 +56,7 @@ class BaseScreen(Screen):
         yield Footer()
 
     def get_title(self) -> str:
-        return "Base Screen"
+        return self.FORM_TITLE
 
     def get_form_elements(self) -> list[ComposeResult]:
         return []
@@ -40,14 +65,47 @@ class BaseScreen(Screen):
 class ConfigurationScreen(BaseScreen):
     """Base screen provider configuration with submit functionality."""
 
-    BINDINGS = BaseScreen.BINDINGS + [
-        Binding("shift+enter", "submit", "Submit"),
-    ]
+    BINDINGS = COMMON_BINDINGS + (SUBMIT_BINDING,)
+
+    FIELDS: tuple[FieldSpec, ...] = ()
+    _INPUT_KWARGS: tuple[dict[str, Any], ...] = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # flatten FIELDS once per class instead of on every compose
+        cls._INPUT_KWARGS = tuple(
+            {
+                "placeholder": field.placeholder,
+                "password": field.password,
+                "id": field.id,
+                "classes": "form-control",
+            }
+            for field in cls.FIELDS
+        )
+
+    def get_form_elements(self) -> list[ComposeResult]:
+        return [Input(**kwargs) for kwargs in self._INPUT_KWARGS]
 
     def on_input_submitted(self, event: Input.Submitted) -> None:
         """Catches the Enter key press and delegates the work."""
         self.process_submission()
 
+    def get_form_values(self) -> dict[str, Optional[str]]:
+        """Collect every form field value, keyed by widget id.
+
+        Empty inputs and unselected Selects come back as None, so they are never
+        handed to an SDK constructor as "" or as Textual's blank sentinel.
+        """
+        values: dict[str, Optional[str]] = {}
+        for field in self.query(Input):
+            if field.id is not None:
+                values[field.id] = field.value or None
+        for select in self.query(Select):
+            if select.id is not None:
+                value = select.value
+                values[select.id] = value if isinstance(value, str) and value else None
+        return values
+
     def process_submission(self) -> None:
         """
         To be implemented by each specific provider screen.
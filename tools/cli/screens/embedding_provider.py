@@ -1,34 +1,58 @@
+import importlib
+from typing import Optional
+
 from textual import on
+from textual.screen import Screen
+from textual.timer import Timer
 from textual.widgets import Select
 
 from .base import BaseScreen
-from .embedding_providers import (
-    OpenAIEmbeddingScreen,
-    BedrockEmbeddingScreen,
-    AzureEmbeddingScreen,
-    GeminiEmbeddingScreen,
-    CohereEmbeddingScreen,
-    HuggingFaceEmbeddingScreen,
+
+PROVIDER_OPTIONS = (
+    ("OpenAI", "OpenAI"),
+    ("Cohere", "Cohere"),
+    ("Bedrock", "Bedrock"),
+    ("HuggingFace", "HuggingFace"),
+    ("Azure", "Azure"),
+    ("Gemini", "Gemini"),
 )
 
+# provider -> (module, class); screens are imported the first time they are picked
+PROVIDER_SCREENS = {
+    "OpenAI": (".embedding_providers.openai", "OpenAIEmbeddingScreen"),
+    "Bedrock": (".embedding_providers.bedrock", "BedrockEmbeddingScreen"),
+    "Azure": (".embedding_providers.azure", "AzureEmbeddingScreen"),
+    "Gemini": (".embedding_providers.gemini", "GeminiEmbeddingScreen"),
+    "Cohere": (".embedding_providers.cohere", "CohereEmbeddingScreen"),
+    "HuggingFace": (".embedding_providers.huggingface", "HuggingFaceEmbeddingScreen"),
+}
+_screen_classes: dict[str, type[Screen]] = {}
+
+# rapid changes (e.g. arrowing through the list) are coalesced into one push
+SELECTION_DEBOUNCE = 0.05
+
+
+def get_provider_screen(provider: str) -> Optional[type[Screen]]:
+    screen_class = _screen_classes.get(provider)
+    if screen_class is None and provider in PROVIDER_SCREENS:
+        module_name, class_name = PROVIDER_SCREENS[provider]
+        module = importlib.import_module(module_name, __package__)
+        screen_class = _screen_classes[provider] = getattr(module, class_name)
+    return screen_class
+
 
 class ProviderSelectScreen(BaseScreen):
     """Screen for selecting embedding provider."""
 
-    def get_title(self) -> str:
-        return "Select an embedding provider"
+    FORM_TITLE = "Select an embedding provider"
+
+    _pending_provider: object = None
+    _selection_timer: Optional[Timer] = None
 
     def get_form_elements(self) -> list:
         return [
             Select(
-                options=[
-                    ("OpenAI", "OpenAI"),
-                    ("Cohere", "Cohere"),
-                    ("Bedrock", "Bedrock"),
-                    ("HuggingFace", "HuggingFace"),
-                    ("Azure", "Azure"),
-                    ("Gemini", "Gemini"),
-                ],
+                options=PROVIDER_OPTIONS,
                 prompt="Please select an embedding provider",
                 classes="form-control",
                 id="provider_select",
@@ -37,26 +61,26 @@ class ProviderSelectScreen(BaseScreen):
 
     @on(Select.Changed, "#provider_select")
     def handle_selection(self, event: Select.Changed) -> None:
-        from ..embedding_app import EmbeddingSetupApp
+        # clearing the Select emits a non-string blank sentinel
+        if not isinstance(event.value, str):
+            return
+        self._pending_provider = event.value
+        if self._selection_timer is not None:
+            self._selection_timer.stop()
+        self._selection_timer = self.set_timer(
+            SELECTION_DEBOUNCE, self._flush_selection
+        )
 
-        app = self.app
-        if isinstance(app, EmbeddingSetupApp):
-            app.config.provider = event.value
+    def _flush_selection(self) -> None:
+        self._selection_timer = None
+        config = getattr(self.app, "config", None)
+        if config is not None:
+            config.provider = self._pending_provider
             self.handle_next()
 
     def handle_next(self) -> None:
-        from ..embedding_app import EmbeddingSetupApp
-
-        app = self.app
-        if isinstance(app, EmbeddingSetupApp):
-            provider_screens = {
-                "OpenAI": OpenAIEmbeddingScreen,
-                "Bedrock": BedrockEmbeddingScreen,
-                "Azure": AzureEmbeddingScreen,
-                "Gemini": GeminiEmbeddingScreen,
-                "Cohere": CohereEmbeddingScreen,
-                "HuggingFace": HuggingFaceEmbeddingScreen,
-            }
-            screen_class = provider_screens.get(app.config.provider)
+        config = getattr(self.app, "config", None)
+        if config is not None:
+            screen_class = get_provider_screen(config.provider)
             if screen_class:
-                app.push_screen(screen_class())
+                self.app.push_screen(screen_class())
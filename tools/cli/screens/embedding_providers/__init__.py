@@ -1,9 +1,15 @@
-from .openai import OpenAIEmbeddingScreen
-from .bedrock import BedrockEmbeddingScreen
-from .azure import AzureEmbeddingScreen
-from .gemini import GeminiEmbeddingScreen
-from .cohere import CohereEmbeddingScreen
-from .huggingface import HuggingFaceEmbeddingScreen
+import importlib
+from typing import Any
+
+# screens are imported on first access, so that importing the package stays cheap
+_LAZY = {
+    "OpenAIEmbeddingScreen": ".openai",
+    "BedrockEmbeddingScreen": ".bedrock",
+    "AzureEmbeddingScreen": ".azure",
+    "GeminiEmbeddingScreen": ".gemini",
+    "CohereEmbeddingScreen": ".cohere",
+    "HuggingFaceEmbeddingScreen": ".huggingface",
+}
 
 __all__ = [
     "OpenAIEmbeddingScreen",
@@ -13,3 +19,11 @@ __all__ = [
     "CohereEmbeddingScreen",
     "HuggingFaceEmbeddingScreen",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
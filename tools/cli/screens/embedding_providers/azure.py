@@ -1,38 +1,29 @@
-from textual.app import ComposeResult
-from textual.widgets import Input
-
-from llama_index.embeddings.azure_inference import AzureAIEmbeddingsModel
-from llama_cloud import PipelineCreateEmbeddingConfig_AzureEmbedding
-
-from ..base import ConfigurationScreen
+from ..base import ConfigurationScreen, FieldSpec
 
 
 class AzureEmbeddingScreen(ConfigurationScreen):
     """Configuration screen for Azure embeddings."""
 
-    def get_title(self) -> str:
-        return "Azure Embedding Configuration"
+    FORM_TITLE = "Azure Embedding Configuration"
 
-    def get_form_elements(self) -> list[ComposeResult]:
-        return [
-            Input(
-                placeholder="API Key",
-                password=True,
-                id="api_key",
-                classes="form-control",
-            ),
-            Input(placeholder="Endpoint URL", id="endpoint", classes="form-control"),
-        ]
+    FIELDS = (
+        FieldSpec("api_key", "API Key", password=True),
+        FieldSpec("endpoint", "Endpoint URL"),
+    )
 
     def process_submission(self) -> None:
-        api_key = self.query_one("#api_key", Input).value
-        endpoint = self.query_one("#endpoint", Input).value
+        values = self.get_form_values()
+        api_key = values["api_key"]
+        endpoint = values["endpoint"]
 
         if not all([api_key, endpoint]):
             self.notify("All fields are required.", severity="error")
             return
 
         try:
+            from llama_index.embeddings.azure_inference import AzureAIEmbeddingsModel
+            from llama_cloud import PipelineCreateEmbeddingConfig_AzureEmbedding
+
             embed_model = AzureAIEmbeddingsModel(credential=api_key, endpoint=endpoint)
             embedding_config = PipelineCreateEmbeddingConfig_AzureEmbedding(
                 type="AZURE_EMBEDDING", component=embed_model
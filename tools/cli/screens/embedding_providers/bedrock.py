@@ -1,27 +1,39 @@
+from functools import lru_cache
+
 from textual.app import ComposeResult
-from textual.widgets import Input, Select
+from textual.widgets import Select
+
+from ..base import ConfigurationScreen, FieldSpec
+
 
-from llama_index.embeddings.bedrock import BedrockEmbedding
-from llama_cloud import PipelineCreateEmbeddingConfig_BedrockEmbedding
+@lru_cache(maxsize=1)
+def _bedrock_model_options() -> tuple[tuple[str, str], ...]:
+    # the model list is static: build it once, not every time the screen is shown
+    from llama_index.embeddings.bedrock import BedrockEmbedding
 
-from ..base import ConfigurationScreen
+    supported_models = BedrockEmbedding.list_supported_models()
+    return tuple(
+        (f"{provider.title()}: {model_id.split('.')[-1]}", model_id)
+        for provider, models in supported_models.items()
+        for model_id in models
+    )
 
 
 class BedrockEmbeddingScreen(ConfigurationScreen):
     """Configuration screen for Bedrock embeddings."""
 
-    def get_title(self) -> str:
-        return "Bedrock Embedding Configuration"
+    FORM_TITLE = "Bedrock Embedding Configuration"
+
+    FIELDS = (
+        FieldSpec("region", "Region (e.g., us-east-1)"),
+        FieldSpec("access_key_id", "Access Key ID (Optional)"),
+        FieldSpec("secret_access_key", "Secret Access Key (Optional)", password=True),
+    )
 
     def get_form_elements(self) -> list[ComposeResult]:
-        model_options = []
+        model_options: tuple[tuple[str, str], ...] = ()
         try:
-            supported_models = BedrockEmbedding.list_supported_models()
-            model_options = [
-                (f"{provider.title()}: {model_id.split('.')[-1]}", model_id)
-                for provider, models in supported_models.items()
-                for model_id in models
-            ]
+            model_options = _bedrock_model_options()
         except Exception as e:
             self.notify(
                 f"Could not fetch Bedrock models: {e}", severity="error", timeout=10
@@ -34,35 +46,24 @@ class BedrockEmbeddingScreen(ConfigurationScreen):
                 id="model",
                 classes="form-control",
             ),
-            Input(
-                placeholder="Region (e.g., us-east-1)",
-                id="region",
-                classes="form-control",
-            ),
-            Input(
-                placeholder="Access Key ID (Optional)",
-                id="access_key_id",
-                classes="form-control",
-            ),
-            Input(
-                placeholder="Secret Access Key (Optional)",
-                password=True,
-                id="secret_access_key",
-                classes="form-control",
-            ),
+            *super().get_form_elements(),
         ]
 
     def process_submission(self) -> None:
-        model = self.query_one("#model", Select).value
-        region = self.query_one("#region", Input).value
-        access_key_id = self.query_one("#access_key_id", Input).value
-        secret_access_key = self.query_one("#secret_access_key", Input).value
+        values = self.get_form_values()
+        model = values["model"]
+        region = values["region"]
+        access_key_id = values["access_key_id"]
+        secret_access_key = values["secret_access_key"]
 
         if not all([model, region]):
             self.notify("All fields are required.", severity="error")
             return
 
         try:
+            from llama_index.embeddings.bedrock import BedrockEmbedding
+            from llama_cloud import PipelineCreateEmbeddingConfig_BedrockEmbedding
+
             embed_model = BedrockEmbedding(
                 model_name=model,
                 region_name=region,
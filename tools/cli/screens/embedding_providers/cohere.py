@@ -1,38 +1,29 @@
-from textual.app import ComposeResult
-from textual.widgets import Input
-
-from llama_index.embeddings.cohere import CohereEmbedding
-from llama_cloud import PipelineCreateEmbeddingConfig_CohereEmbedding
-
-from ..base import ConfigurationScreen
+from ..base import ConfigurationScreen, FieldSpec
 
 
 class CohereEmbeddingScreen(ConfigurationScreen):
     """Configuration screen for Cohere embeddings."""
 
-    def get_title(self) -> str:
-        return "Cohere Embedding Configuration"
+    FORM_TITLE = "Cohere Embedding Configuration"
 
-    def get_form_elements(self) -> list[ComposeResult]:
-        return [
-            Input(
-                placeholder="API Key",
-                password=True,
-                id="api_key",
-                classes="form-control",
-            ),
-            Input(placeholder="Model", id="model", classes="form-control"),
-        ]
+    FIELDS = (
+        FieldSpec("api_key", "API Key", password=True),
+        FieldSpec("model", "Model"),
+    )
 
     def process_submission(self) -> None:
-        api_key = self.query_one("#api_key", Input).value
-        model = self.query_one("#model", Input).value
+        values = self.get_form_values()
+        api_key = values["api_key"]
+        model = values["model"]
 
         if not all([api_key, model]):
             self.notify("All fields are required", severity="error")
             return
 
         try:
+            from llama_index.embeddings.cohere import CohereEmbedding
+            from llama_cloud import PipelineCreateEmbeddingConfig_CohereEmbedding
+
             embed_model = CohereEmbedding(
                 model_name=model,
                 api_key=api_key,
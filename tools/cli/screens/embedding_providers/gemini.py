@@ -1,21 +1,19 @@
 from textual.app import ComposeResult
 from textual.widgets import Input
 
-from llama_index.embeddings.gemini import GeminiEmbedding
-from llama_cloud import PipelineCreateEmbeddingConfig_GeminiEmbedding
-
-from ..base import ConfigurationScreen
+from ..base import ConfigurationScreen, FieldSpec
 
 
 class GeminiEmbeddingScreen(ConfigurationScreen):
     """Configuration screen for Gemini embeddings."""
 
+    FORM_TITLE = "Gemini Embedding Configuration"
+
+    FIELDS = (FieldSpec("api_key", "API Key", password=True),)
+
     # This is the only model currently available in the API
     DEFAULT_MODEL = "models/embedding-001"
 
-    def get_title(self) -> str:
-        return "Gemini Embedding Configuration"
-
     def get_form_elements(self) -> list[ComposeResult]:
         return [
             Input(
@@ -24,12 +22,7 @@ class GeminiEmbeddingScreen(ConfigurationScreen):
                 classes="form-control",
                 disabled=True,
             ),
-            Input(
-                placeholder="API Key",
-                password=True,
-                id="api_key",
-                classes="form-control",
-            ),
+            *super().get_form_elements(),
         ]
 
     def process_submission(self) -> None:
@@ -40,6 +33,9 @@ class GeminiEmbeddingScreen(ConfigurationScreen):
             return
 
         try:
+            from llama_index.embeddings.gemini import GeminiEmbedding
+            from llama_cloud import PipelineCreateEmbeddingConfig_GeminiEmbedding
+
             embed_model = GeminiEmbedding(
                 api_key=api_key, model_name=self.DEFAULT_MODEL
             )
@@ -1,37 +1,21 @@
-from textual.app import ComposeResult
-from textual.widgets import Input
-
-from llama_index.embeddings.huggingface_api import HuggingFaceInferenceAPIEmbedding
-from llama_cloud import PipelineCreateEmbeddingConfig_HuggingfaceApiEmbedding
-
-from ..base import ConfigurationScreen
+from ..base import ConfigurationScreen, FieldSpec
 
 
 class HuggingFaceEmbeddingScreen(ConfigurationScreen):
     """Configuration screen for HuggingFace embeddings."""
 
-    def get_title(self) -> str:
-        return "HuggingFace Embedding Configuration"
-
-    def get_form_elements(self) -> list[ComposeResult]:
-        return [
-            Input(
-                placeholder="HuggingFace API Token",
-                password=True,
-                id="api_key",
-                classes="form-control",
-            ),
-            Input(
-                placeholder="Model name",
-                id="model",
-                classes="form-control",
-            ),
-        ]
+    FORM_TITLE = "HuggingFace Embedding Configuration"
+
+    FIELDS = (
+        FieldSpec("api_key", "HuggingFace API Token", password=True),
+        FieldSpec("model", "Model name"),
+    )
 
     def process_submission(self) -> None:
         """Handle form submission by creating HuggingFace embedding configuration."""
-        api_key = self.query_one("#api_key", Input).value
-        model = self.query_one("#model", Input).value
+        values = self.get_form_values()
+        api_key = values["api_key"]
+        model = values["model"]
 
         if not api_key:
             self.notify("HuggingFace API Token is required", severity="error")
@@ -42,6 +26,13 @@ class HuggingFaceEmbeddingScreen(ConfigurationScreen):
             return
 
         try:
+            from llama_index.embeddings.huggingface_api import (
+                HuggingFaceInferenceAPIEmbedding,
+            )
+            from llama_cloud import (
+                PipelineCreateEmbeddingConfig_HuggingfaceApiEmbedding,
+            )
+
             embed_model = HuggingFaceInferenceAPIEmbedding(
                 token=api_key, model_name=model
             )
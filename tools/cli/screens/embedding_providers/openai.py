@@ -1,38 +1,38 @@
 import os
-from textual.app import ComposeResult
-from textual.widgets import Input
+from typing import Any, Optional
 
-from llama_index.embeddings.openai import OpenAIEmbedding
-from llama_cloud import PipelineCreateEmbeddingConfig_OpenaiEmbedding
+from ..base import ConfigurationScreen, FieldSpec
 
-from ..base import ConfigurationScreen
+
+def build_openai_embedding_config(model: str, api_key: Optional[str]) -> Any:
+    # llama_cloud only needs the serializable settings: there is no need to
+    # import llama_index or build a live OpenAIEmbedding client for them
+    from llama_cloud import (
+        OpenAiEmbedding,
+        PipelineCreateEmbeddingConfig_OpenaiEmbedding,
+    )
+
+    return PipelineCreateEmbeddingConfig_OpenaiEmbedding(
+        type="OPENAI_EMBEDDING",
+        component=OpenAiEmbedding(model_name=model, api_key=api_key),
+    )
 
 
 class OpenAIEmbeddingScreen(ConfigurationScreen):
     """Configuration screen for OpenAI embeddings."""
 
-    def get_title(self) -> str:
-        return "OpenAI Embedding Configuration"
-
-    def get_form_elements(self) -> list[ComposeResult]:
-        return [
-            Input(
-                placeholder="API Key (optional if OPENAI_API_KEY set)",
-                id="api_key",
-                password=True,
-                classes="form-control",
-            ),
-            Input(
-                placeholder="Model",
-                id="model",
-                classes="form-control",
-            ),
-        ]
+    FORM_TITLE = "OpenAI Embedding Configuration"
+
+    FIELDS = (
+        FieldSpec("api_key", "API Key (optional if OPENAI_API_KEY set)", password=True),
+        FieldSpec("model", "Model"),
+    )
 
     def process_submission(self) -> None:
         """Handle form submission by creating OpenAI embedding configuration."""
-        api_key = self.query_one("#api_key", Input).value or os.getenv("OPENAI_API_KEY")
-        model = self.query_one("#model", Input).value
+        values = self.get_form_values()
+        api_key = values["api_key"] or os.getenv("OPENAI_API_KEY")
+        model = values["model"]
 
         if not api_key:
             self.notify(
@@ -44,12 +44,7 @@ class OpenAIEmbeddingScreen(ConfigurationScreen):
             return
 
         try:
-            embed_model = OpenAIEmbedding(model=model, api_key=api_key)
-            embedding_config = PipelineCreateEmbeddingConfig_OpenaiEmbedding(
-                type="OPENAI_EMBEDDING",
-                component=embed_model,
-            )
-            self.app.config = embedding_config
+            self.app.config = build_openai_embedding_config(model, api_key)
             self.app.handle_completion(self.app.config)
         except Exception as e:
             self.notify(f"Error: {e}", severity="error")
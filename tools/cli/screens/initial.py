@@ -3,20 +3,21 @@ from textual.widgets import Select
 
 from .base import BaseScreen
 
+SETUP_OPTIONS = (
+    ("With Default Settings", "default_settings"),
+    ("With Custom Settings", "custom_settings"),
+)
+
 
 class InitialScreen(BaseScreen):
     """Initial screen for choosing between default or custom settings."""
 
-    def get_title(self) -> str:
-        return "How do you wish to proceed?"
+    FORM_TITLE = "How do you wish to proceed?"
 
     def get_form_elements(self) -> list:
         return [
             Select(
-                options=[
-                    ("With Default Settings", "default_settings"),
-                    ("With Custom Settings", "custom_settings"),
-                ],
+                options=SETUP_OPTIONS,
                 prompt="Please select one of the following",
                 id="setup_type",
                 classes="form-control",
@@ -25,20 +26,22 @@ class InitialScreen(BaseScreen):
 
     @on(Select.Changed, "#setup_type")
     def handle_selection(self, event: Select.Changed) -> None:
-        from ..embedding_app import EmbeddingSetupApp
-
-        app = self.app
-        if isinstance(app, EmbeddingSetupApp):
-            app.config.setup_type = event.value
+        # clearing the Select emits a non-string blank sentinel
+        if not isinstance(event.value, str):
+            return
+        # duck-typed on the app's config rather than importing EmbeddingSetupApp
+        config = getattr(self.app, "config", None)
+        if config is not None and self.begin_navigation():
+            config.setup_type = event.value
             self.handle_next()
 
     def handle_next(self) -> None:
-        from ..embedding_app import EmbeddingSetupApp
         from .embedding_provider import ProviderSelectScreen
 
-        app = self.app
-        if isinstance(app, EmbeddingSetupApp):
-            if app.config.setup_type == "default_settings":
-                app.handle_default_setup()
-            else:
-                app.push_screen(ProviderSelectScreen())
+        config = getattr(self.app, "config", None)
+        if config is None:
+            return
+        if config.setup_type == "default_settings":
+            self.app.handle_default_setup()
+        else:
+            self.app.push_screen(ProviderSelectScreen())
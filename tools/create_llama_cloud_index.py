@@ -1,14 +1,48 @@
 import os
-from dotenv import load_dotenv, find_dotenv
+from functools import lru_cache
+from typing import Any
+
+from dotenv import load_dotenv, find_dotenv, set_key
 from cli.embedding_app import EmbeddingSetupApp
 
-from llama_cloud import (
-    PipelineTransformConfig_Advanced,
-    AdvancedModeTransformConfigChunkingConfig_Sentence,
-    AdvancedModeTransformConfigSegmentationConfig_Page,
-    PipelineCreate,
-)
-from llama_cloud.client import LlamaCloud
+
+@lru_cache(maxsize=1)
+def _transform_config() -> Any:
+    # built (and validated) once; llama_cloud is imported only when it is needed
+    from llama_cloud import (
+        PipelineTransformConfig_Advanced,
+        AdvancedModeTransformConfigChunkingConfig_Sentence,
+        AdvancedModeTransformConfigSegmentationConfig_Page,
+    )
+
+    return PipelineTransformConfig_Advanced(
+        segmentation_config=AdvancedModeTransformConfigSegmentationConfig_Page(
+            mode="page"
+        ),
+        chunking_config=AdvancedModeTransformConfigChunkingConfig_Sentence(
+            chunk_size=1024,
+            chunk_overlap=200,
+            separator="<whitespace>",
+            paragraph_separator="\n\n\n",
+            mode="sentence",
+        ),
+        mode="advanced",
+    )
+
+
+def _upsert_pipeline(client: Any, embedding_config: Any) -> str:
+    from llama_cloud import PipelineCreate
+
+    pipeline_request = PipelineCreate(
+        name="notebooklm_pipeline",
+        embedding_config=embedding_config,
+        transform_config=_transform_config(),
+    )
+    pipeline = client.pipelines.upsert_pipeline(request=pipeline_request)
+
+    # upsert, so rerunning the setup replaces the id instead of appending a duplicate
+    set_key(".env", "LLAMACLOUD_PIPELINE_ID", pipeline.id)
+    return pipeline.id
 
 
 def main():
@@ -16,7 +50,6 @@ def main():
     Create a new Llama Cloud index with the given embedding configuration.
     """
     load_dotenv(find_dotenv())
-    client = LlamaCloud(token=os.getenv("LLAMACLOUD_API_KEY"))
 
     # Run the embedding setup app to get the embedding configuration
     # This prompts the user to select an embedding provider and configure the embedding model
@@ -24,32 +57,10 @@ def main():
     embedding_config = app.run()
 
     if embedding_config:
-        segm_config = AdvancedModeTransformConfigSegmentationConfig_Page(mode="page")
-        chunk_config = AdvancedModeTransformConfigChunkingConfig_Sentence(
-            chunk_size=1024,
-            chunk_overlap=200,
-            separator="<whitespace>",
-            paragraph_separator="\n\n\n",
-            mode="sentence",
-        )
-
-        transform_config = PipelineTransformConfig_Advanced(
-            segmentation_config=segm_config,
-            chunking_config=chunk_config,
-            mode="advanced",
-        )
-
-        pipeline_request = PipelineCreate(
-            name="notebooklm_pipeline",
-            embedding_config=embedding_config,
-            transform_config=transform_config,
-        )
-
-        pipeline = client.pipelines.upsert_pipeline(request=pipeline_request)
-
-        with open(".env", "a") as f:
-            f.write(f'\nLLAMACLOUD_PIPELINE_ID="{pipeline.id}"')
+        from llama_cloud.client import LlamaCloud
 
+        client = LlamaCloud(token=os.getenv("LLAMACLOUD_API_KEY"))
+        _upsert_pipeline(client, embedding_config)
         return 0
     else:
         print("No embedding configuration provided")
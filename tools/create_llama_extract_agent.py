@@ -1,26 +1,118 @@
 import sys
 import os
+import json
+import hashlib
+from functools import lru_cache
+from typing import Any
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from llama_cloud_services import LlamaExtract
 from src.notebookllama.models import Notebook
-from dotenv import load_dotenv
+from dotenv import load_dotenv, set_key
 
 load_dotenv()
 
+AGENT_NAME = "q_and_a_agent"
+# agent ids keyed by (account, name, schema), so reruns only check the agent exists
+AGENT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "notebookllama", "extract_agents.json"
+)
+
+
+@lru_cache(maxsize=1)
+def _notebook_schema() -> dict[str, Any]:
+    # generated once and shared by the cache key and create_agent
+    return Notebook.model_json_schema()
+
+
+def _agent_key() -> str:
+    # agent ids are only valid for the account and project they were created in
+    identity = "\0".join(
+        os.getenv(name, "")
+        for name in (
+            "LLAMACLOUD_API_KEY",
+            "LLAMA_CLOUD_BASE_URL",
+            "LLAMA_CLOUD_PROJECT_ID",
+        )
+    )
+    schema = json.dumps(_notebook_schema(), sort_keys=True)
+    return hashlib.sha256(
+        "\0".join((identity, AGENT_NAME, schema)).encode()
+    ).hexdigest()
+
+
+def _load_agent_cache() -> dict[str, str]:
+    try:
+        with open(AGENT_CACHE_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_agent_cache(cache: dict[str, str]) -> None:
+    os.makedirs(os.path.dirname(AGENT_CACHE_PATH), exist_ok=True)
+    with open(AGENT_CACHE_PATH, "w") as f:
+        json.dump(cache, f)
+
+
+def _store_agent_id(key: str, agent_id: str) -> None:
+    cache = _load_agent_cache()
+    cache[key] = agent_id
+    _save_agent_cache(cache)
+
+
+def _forget_agent_id(key: str) -> None:
+    cache = _load_agent_cache()
+    if cache.pop(key, None) is not None:
+        _save_agent_cache(cache)
+
+
+def _is_current_schema(schema: dict[str, Any]) -> bool:
+    # the server may reorder the schema or add keys of its own
+    expected = _notebook_schema()
+    actual = {k: v for k, v in schema.items() if k in expected}
+    return json.dumps(actual, sort_keys=True) == json.dumps(expected, sort_keys=True)
+
 
 def main() -> int:
+    from llama_cloud.core.api_error import ApiError
+    from llama_cloud_services import LlamaExtract
+
     conn = LlamaExtract(api_key=os.getenv("LLAMACLOUD_API_KEY"))
-    try:
-        agent = conn.create_agent(name="q_and_a_agent", data_schema=Notebook)
-        _id = agent.id
-        with open(".env", "a") as f:
-            f.write(f'\nEXTRACT_AGENT_ID="{_id}"')
+    key = _agent_key()
+    agent_id = _load_agent_cache().get(key)
+    if agent_id is not None:
+        try:
+            conn.get_agent(id=agent_id)
+        except ApiError as e:
+            if e.status_code != 404:
+                raise
+            # deleted since it was cached: create it again
+            _forget_agent_id(key)
+            agent_id = None
+    if agent_id is None:
+        try:
+            agent = conn.create_agent(name=AGENT_NAME, data_schema=_notebook_schema())
+        except ApiError as e:
+            if e.status_code != 409:
+                raise
+            # created by an earlier run: only reuse it if its schema is current
+            agent = conn.get_agent(name=AGENT_NAME)
+            if not _is_current_schema(agent.data_schema):
+                print(
+                    f"An extraction agent named {AGENT_NAME} already exists with "
+                    "an outdated schema: delete it and run this script again."
+                )
+                return 1
+        agent_id = agent.id
+        _store_agent_id(key, agent_id)
+
+    if os.getenv("EXTRACT_AGENT_ID") == agent_id:
+        print("Your extraction agent already exists.")
         return 0
-    except Exception as e:
-        print(f"Your extraction agent already exists.")
-        return 1
+    set_key(".env", "EXTRACT_AGENT_ID", agent_id)
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())